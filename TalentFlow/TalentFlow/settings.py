@@ -147,3 +147,59 @@ MEDIA_ROOT = BASE_DIR / 'media'
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/login/'
+
+# RESUME EXTRACTION
+# ================================
+# Uploaded resumes are parsed by `python manage.py process_resume_queue`.
+# Set RESUME_EXTRACTION_EAGER to parse inside the request instead (no worker).
+RESUME_EXTRACTION_EAGER = False
+RESUME_EXTRACTION_WORKERS = 2
+RESUME_EXTRACTION_MAX_ATTEMPTS = 3
+RESUME_EXTRACTION_LEASE = 600  # seconds before a claimed row of a dead worker is retried
+RESUME_TEXT_MAX_CHARS = 100000  # extraction stops once this much text is collected
+
+# Scanned PDFs without a text layer are OCR'd page by page (needs poppler and
+# tesseract). Pages beyond RESUME_OCR_MAX_PAGES, or not done within
+# RESUME_OCR_TIME_BUDGET seconds, are skipped. Pages are OCR'd one at a time,
+# except in process_resume_queue when it extracts a single resume: then
+# RESUME_OCR_WORKERS processes share its pages.
+RESUME_OCR_DPI = 200
+RESUME_OCR_MAX_PAGES = 5
+RESUME_OCR_WORKERS = 2
+RESUME_OCR_TIME_BUDGET = 60
+
+# ATS SCORING TRACE
+# ================================
+# Scoring breakdowns are written as JSON lines by a background thread and
+# shown on /admin/ats-debug/. Every scored (student, job) pair is a candidate
+# entry, so only SAMPLE_RATE (0.0 - 1.0) of them are traced; raise it while
+# debugging, or set ENABLED to False to switch tracing off.
+ATS_TRACE = {
+    'ENABLED': True,
+    'PATH': BASE_DIR / 'ats_trace.jsonl',
+    'SAMPLE_RATE': 0.01,
+    'MAX_BYTES': 5 * 1024 * 1024,
+    'BACKUP_COUNT': 3,
+}
+
+# OUTGOING EMAIL
+# ================================
+# Mail is queued in the OutgoingEmail table and delivered by
+# `python manage.py send_queued_email`. Set EMAIL_OUTBOX_EAGER to send
+# inside the request instead (no worker).
+EMAIL_OUTBOX_EAGER = False
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60  # seconds, doubled after every failed attempt
+
+# NOTIFICATIONS
+# ================================
+# "New matching job" alerts are fanned out by `python manage.py send_job_alerts`.
+# Set JOB_ALERTS_EAGER to send them right after the posting request commits instead.
+JOB_ALERTS_EAGER = False
+JOB_ALERT_MIN_MATCHED_SKILLS = 1  # shared skills needed for a "new matching job" alert
+NOTIFICATION_RETENTION_DAYS = 90  # read notifications older than this are pruned by prune_notifications
+
+# JOB SEARCH
+# ================================
+JOB_SEARCH_BACKEND = 'auto'  # 'fts' (SQLite FTS5 table), 'memory' (in-process index) or 'auto'
+RESUME_SEARCH_BACKEND = 'auto'  # 'fts' (SQLite FTS5 table), 'python' (scan stored text of applicants) or 'auto'
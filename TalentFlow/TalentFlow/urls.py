@@ -6,8 +6,9 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    # userapp first so its admin/ats-debug/ page is not swallowed by the admin site
     path('', include('userapp.urls')),
+    path('admin/', admin.site.urls),
 ]
 
 # ✅ Serve media files in development
@@ -1,7 +1,7 @@
-
 from django.apps import AppConfig
 
 class UserappConfig(AppConfig):
     name = 'userapp'
 
-
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,198 @@
+"""Vectorized ATS scoring of many students against many jobs.
+
+`score_matrix` computes the full student-by-job score matrix with NumPy.
+Skills and certifications are sparse 0/1 matrices over the jobs' vocabulary,
+held in compressed sparse row form (for every skill, the jobs requiring it),
+so memory grows with the number of required skills rather than vocabulary x
+jobs. Every match count in a block of students is one sparse product. Scores
+are exactly what `calculate_ats_score(profile, job)` returns for each pair
+(scored against the student's profile resume).
+"""
+import numpy as np
+
+from .skills import mask_skill_ids, skill_forms, skill_id, skill_ids, skill_name
+from .utils import ScoringProfile, _find_skills, _resume_analysis_for, prefetch_resume_analyses
+
+# students whose resumes are looked up together; stays below the resume memo size
+RESUME_BLOCK = 100
+
+
+class _Postings:
+    """A 0/1 column-by-job matrix in compressed sparse row form.
+
+    The jobs having column c are `jobs[indptr[c]:indptr[c + 1]]`.
+    """
+
+    def __init__(self, job_columns, size):
+        self.job_count = len(job_columns)
+        lengths = [len(cols) for cols in job_columns]
+        columns = np.fromiter((c for cols in job_columns for c in cols), dtype=np.int64, count=sum(lengths))
+        jobs = np.repeat(np.arange(self.job_count, dtype=np.int64), lengths)
+        order = np.argsort(columns, kind='stable')
+        self.jobs = jobs[order]
+        self.indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(columns, minlength=size), out=self.indptr[1:])
+
+    def match_counts(self, rows):
+        """(len(rows), jobs) array: how many of the columns in rows[i] job j has.
+
+        Each row lists distinct columns. Only the posting lists of those columns
+        are read, so the work is proportional to the matches, not to the jobs.
+        """
+        counts = np.zeros(len(rows) * self.job_count, dtype=np.int64)
+        lengths = [len(cols) for cols in rows]
+        if sum(lengths):
+            row_ids = np.repeat(np.arange(len(rows), dtype=np.int64), lengths)
+            columns = np.fromiter((c for cols in rows for c in cols), dtype=np.int64, count=sum(lengths))
+            starts = self.indptr[columns]
+            sizes = self.indptr[columns + 1] - starts
+            total = int(sizes.sum())
+            if total:
+                # positions of every job in the selected posting lists, one flat array
+                ends = np.cumsum(sizes)
+                positions = np.arange(total, dtype=np.int64) + np.repeat(starts - (ends - sizes), sizes)
+                cells = np.repeat(row_ids, sizes) * self.job_count + self.jobs[positions]
+                counts = np.bincount(cells, minlength=len(rows) * self.job_count)
+        return counts.reshape(len(rows), self.job_count).astype(np.float64)
+
+
+class JobMatrix:
+    """Jobs encoded once for scoring against any number of students."""
+
+    def __init__(self, jobs, version=None):
+        self.version = version
+        self.jobs = list(jobs)
+        job_skills = [skill_ids(job.get_required_skills() or []) for job in self.jobs]
+        job_certs = [job.get_required_certifications() or [] for job in self.jobs]
+
+        self.skill_columns = {}
+        for ids in job_skills:
+            for sid in ids:
+                self.skill_columns.setdefault(sid, len(self.skill_columns))
+        self.cert_columns = {}
+        for certs in job_certs:
+            for cert in certs:
+                self.cert_columns.setdefault(cert, len(self.cert_columns))
+
+        self.skills = _Postings(
+            [[self.skill_columns[sid] for sid in ids] for ids in job_skills], len(self.skill_columns)
+        )
+        # only skills with canonical names longer than 2 count as resume matches
+        self.long_skills = _Postings(
+            [[self.skill_columns[sid] for sid in ids if len(skill_name(sid)) > 2] for ids in job_skills],
+            len(self.skill_columns),
+        )
+        self.certs = _Postings(
+            [sorted({self.cert_columns[cert] for cert in certs}) for certs in job_certs], len(self.cert_columns)
+        )
+
+        # the per-pair engine divides by the number of distinct skills but by
+        # the raw length of the certification list
+        self.skill_count = np.array([len(ids) for ids in job_skills], dtype=np.float64)
+        self.cert_count = np.array([len(certs) for certs in job_certs], dtype=np.float64)
+        self.min_cgpa = np.array([job.min_cgpa or 0 for job in self.jobs], dtype=np.float64)
+        self.min_experience = np.array([job.min_experience or 0 for job in self.jobs], dtype=np.float64)
+        self.resume_forms = {
+            form
+            for sid in self.skill_columns if len(skill_name(sid)) > 2
+            for form in skill_forms(sid)
+        }
+
+
+def _resume_skill_ids(snapshot, forms):
+    """(has resume text, skill ids found in it) for the profile resume, as the engine sees it."""
+    text = ''
+    try:
+        if snapshot.resume and getattr(snapshot.resume, 'path', None):
+            analysis = _resume_analysis_for(snapshot.resume)
+            if analysis['is_resume_like']:
+                text = analysis['text']
+    except Exception:
+        text = ''
+    if not text.strip():
+        return False, set()
+    return True, {skill_id(form) for form in _find_skills(text.lower(), forms)}
+
+
+def _python_round(scores):
+    """round(x, 2) for every element, with Python's (correctly rounded) result.
+
+    np.round scales by 100 and may round the other way when x * 100 lands
+    within floating point error of .5; those few elements are redone with
+    the builtin.
+    """
+    rounded = np.round(scores, 2)
+    scaled = scores * 100
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-7
+    for index in zip(*np.nonzero(near_tie)):
+        rounded[index] = round(float(scores[index]), 2)
+    return rounded
+
+
+def _columns(keys, columns):
+    return sorted({columns[key] for key in keys if key in columns})
+
+
+def _encode_profiles(profiles, matrix):
+    """Column lists of each student's skills, resume skills and certifications, plus the scalars."""
+    n = len(profiles)
+    skills = []
+    resume_skills = []
+    certs = []
+    has_text = np.zeros(n, dtype=bool)
+    cgpa = np.zeros(n, dtype=np.float64)
+    experience = np.zeros(n, dtype=np.float64)
+
+    for start in range(0, n, RESUME_BLOCK):
+        block = profiles[start:start + RESUME_BLOCK]
+        prefetch_resume_analyses(
+            p.resume for p in block if not isinstance(p, ScoringProfile) and p.resume
+        )
+        for i, profile in enumerate(block, start):
+            snapshot = ScoringProfile.from_profile(profile)
+            skills.append(_columns(mask_skill_ids(snapshot.skill_mask), matrix.skill_columns))
+            certs.append(_columns(snapshot.cert_set, matrix.cert_columns))
+            has_text[i], found = _resume_skill_ids(snapshot, matrix.resume_forms)
+            resume_skills.append(_columns(found, matrix.skill_columns))
+            cgpa[i] = snapshot.cgpa
+            experience[i] = snapshot.experience
+    return skills, resume_skills, certs, has_text, cgpa, experience
+
+
+def score_matrix(profiles, jobs, chunk_size=2048):
+    """Return a (len(profiles), len(jobs)) float array of ATS scores.
+
+    `profiles` are Profiles or ScoringProfiles; `jobs` a list of Jobs or a
+    JobMatrix built from them (reuse one when scoring students in batches).
+    Students are encoded `chunk_size` at a time to bound memory.
+    """
+    matrix = jobs if isinstance(jobs, JobMatrix) else JobMatrix(jobs)
+    profiles = list(profiles)
+    result = np.zeros((len(profiles), len(matrix.jobs)), dtype=np.float64)
+    if not profiles or not matrix.jobs:
+        return result
+
+    skill_count = np.where(matrix.skill_count > 0, matrix.skill_count, 1)
+    cert_count = np.where(matrix.cert_count > 0, matrix.cert_count, 1)
+    min_cgpa = np.where(matrix.min_cgpa != 0, matrix.min_cgpa, 1)
+    min_experience = np.where(matrix.min_experience != 0, matrix.min_experience, 1)
+
+    for start in range(0, len(profiles), chunk_size):
+        skills, resume_skills, certs, has_text, cgpa, experience = _encode_profiles(
+            profiles[start:start + chunk_size], matrix
+        )
+        matched_profile = matrix.skills.match_counts(skills)
+        matched_resume = matrix.long_skills.match_counts(resume_skills)
+        matched_cert = matrix.certs.match_counts(certs)
+
+        # resume matches count when the resume has text and matched anything,
+        # otherwise the profile skills do
+        use_resume = has_text[:, None] & (matched_resume > 0)
+        matched = np.where(use_resume, matched_resume, matched_profile)
+        skill_score = np.where(matrix.skill_count > 0, matched / skill_count * 40, 0)
+        edu_score = np.where(matrix.min_cgpa != 0, np.minimum(cgpa[:, None] / min_cgpa * 30, 30), 0)
+        exp_score = np.where(matrix.min_experience != 0, np.minimum(experience[:, None] / min_experience * 20, 20), 0)
+        cert_score = np.where(matrix.cert_count > 0, matched_cert / cert_count * 10, 0)
+
+        result[start:start + len(skills)] = _python_round(skill_score + edu_score + exp_score + cert_score)
+    return result
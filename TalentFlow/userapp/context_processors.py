@@ -1,13 +1,18 @@
+from django.utils.functional import SimpleLazyObject
+
 from .models import Notification
+from .notifications import unread_count
 
 
 def notifications(request):
-    """Provide recent notifications and unread count to all templates."""
-    if getattr(request, 'user', None) and request.user.is_authenticated:
-        recent = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-        unread = Notification.objects.filter(user=request.user, read=False).count()
+    """Provide recent notifications and unread count to all templates.
+
+    Both are lazy: a page that never shows them runs no query for them.
+    """
+    user = getattr(request, 'user', None)
+    if user and user.is_authenticated:
         return {
-            'recent_notifications': recent,
-            'unread_notifications': unread,
+            'recent_notifications': Notification.objects.filter(user=user).order_by('-created_at')[:5],
+            'unread_notifications': SimpleLazyObject(lambda: unread_count(user)),
         }
     return {}
@@ -0,0 +1,127 @@
+"""SQLite FTS5 indexes over Job and ResumeText, kept in step by triggers.
+
+Each index is an external-content FTS5 table plus insert, delete and update
+triggers on its content table. Any migration that makes SQLite rebuild the
+content table (adding or removing a column, for instance) drops those
+triggers; `restore_fts_indexes` runs after every migrate and puts them back,
+rebuilding the index from the table so nothing written meanwhile is missed.
+Search falls back to its in-process backend while the triggers are missing.
+"""
+
+FTS_INDEXES = {
+    'userapp_job_fts': [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS userapp_job_fts USING fts5(
+            title, description, required_skills,
+            content='userapp_job', content_rowid='id', tokenize='unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS userapp_job_fts_insert AFTER INSERT ON userapp_job BEGIN
+            INSERT INTO userapp_job_fts(rowid, title, description, required_skills)
+            VALUES (new.id, new.title, new.description, new.required_skills);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS userapp_job_fts_delete AFTER DELETE ON userapp_job BEGIN
+            INSERT INTO userapp_job_fts(userapp_job_fts, rowid, title, description, required_skills)
+            VALUES ('delete', old.id, old.title, old.description, old.required_skills);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS userapp_job_fts_update AFTER UPDATE ON userapp_job BEGIN
+            INSERT INTO userapp_job_fts(userapp_job_fts, rowid, title, description, required_skills)
+            VALUES ('delete', old.id, old.title, old.description, old.required_skills);
+            INSERT INTO userapp_job_fts(rowid, title, description, required_skills)
+            VALUES (new.id, new.title, new.description, new.required_skills);
+        END
+        """,
+    ],
+    'userapp_resumetext_fts': [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS userapp_resumetext_fts USING fts5(
+            text, content='userapp_resumetext', content_rowid='id', tokenize='unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS userapp_resumetext_fts_insert AFTER INSERT ON userapp_resumetext BEGIN
+            INSERT INTO userapp_resumetext_fts(rowid, text) VALUES (new.id, new.text);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS userapp_resumetext_fts_delete AFTER DELETE ON userapp_resumetext BEGIN
+            INSERT INTO userapp_resumetext_fts(userapp_resumetext_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS userapp_resumetext_fts_update AFTER UPDATE OF text ON userapp_resumetext BEGIN
+            INSERT INTO userapp_resumetext_fts(userapp_resumetext_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            INSERT INTO userapp_resumetext_fts(rowid, text) VALUES (new.id, new.text);
+        END
+        """,
+    ],
+}
+
+
+def _triggers(table):
+    return (table + '_insert', table + '_delete', table + '_update')
+
+
+def fts5_supported(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def _existing(connection, names):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s)" % ', '.join(['%s'] * len(names)), list(names),
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def fts_ready(connection, table):
+    """True when FTS5 table `table` and its three sync triggers exist."""
+    if connection.vendor != 'sqlite':
+        return False
+    names = (table,) + _triggers(table)
+    return len(_existing(connection, names)) == len(names)
+
+
+def create_fts_index(connection, table):
+    """Create `table` and its triggers where missing, then rebuild it from its content table."""
+    if not fts5_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        for sql in FTS_INDEXES[table]:
+            cursor.execute(sql)
+        cursor.execute("INSERT INTO {0}({0}) VALUES ('rebuild')".format(table))
+
+
+def drop_fts_index(connection, table):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for trigger in _triggers(table):
+            cursor.execute("DROP TRIGGER IF EXISTS %s" % trigger)
+        cursor.execute("DROP TABLE IF EXISTS %s" % table)
+
+
+def restore_fts_indexes(connection):
+    """Recreate the triggers of every FTS table whose content table was rebuilt; return their names.
+
+    Only tables a migration created are repaired, so migrating back before
+    them leaves them gone.
+    """
+    if connection.vendor != 'sqlite':
+        return []
+    restored = []
+    for table in FTS_INDEXES:
+        existing = _existing(connection, (table,) + _triggers(table))
+        if table in existing and not existing.issuperset(_triggers(table)):
+            create_fts_index(connection, table)
+            restored.append(table)
+    return restored
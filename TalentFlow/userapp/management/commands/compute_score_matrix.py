@@ -0,0 +1,37 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from userapp.batch_scoring import JobMatrix, score_matrix
+from userapp.models import Job, Profile
+
+
+class Command(BaseCommand):
+    help = "Score every student against every job with the vectorized engine and print each student's best jobs as JSON lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help="Jobs listed per student.")
+        parser.add_argument('--batch-size', type=int, default=2048, help="Students scored per matrix block.")
+        parser.add_argument('--min-score', type=float, default=0, help="Leave out jobs scoring below this.")
+
+    def handle(self, *args, **options):
+        matrix = JobMatrix(Job.objects.all())
+        profiles = Profile.objects.filter(user_type='student').select_related('user').order_by('pk')
+        batch_size = options['batch_size']
+        scored = 0
+        last_pk = 0
+        while True:
+            batch = list(profiles.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            scores = score_matrix(batch, matrix, chunk_size=batch_size)
+            for profile, row in zip(batch, scores):
+                best = row.argsort()[::-1][:options['top']]
+                jobs = [
+                    {'job_id': matrix.jobs[j].pk, 'score': float(row[j])}
+                    for j in best if row[j] >= options['min_score']
+                ]
+                self.stdout.write(json.dumps({'user': profile.user.username, 'jobs': jobs}))
+            scored += len(batch)
+        self.stderr.write(f"Scored {scored} student(s) against {len(matrix.jobs)} job(s).")
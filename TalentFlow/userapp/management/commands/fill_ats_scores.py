@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from userapp.utils import fill_ats_scores
+
+
+class Command(BaseCommand):
+    help = "Store the ATS scores that edits invalidated, so score-sorted listings can read them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help="Students to fill per batch.")
+        parser.add_argument('--loop', action='store_true', help="Keep polling for invalidated scores instead of exiting when none are missing.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep between polls with --loop.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            filled = fill_ats_scores(limit=options['batch_size'])
+            total += filled
+            if filled:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Filled scores for {total} student(s)."))
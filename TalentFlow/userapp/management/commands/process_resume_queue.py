@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from userapp.utils import process_resume_queue
+
+
+class Command(BaseCommand):
+    help = "Extract queued resumes (text and resume-like verdict) on a local process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help="Resumes to claim per batch.")
+        parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: RESUME_EXTRACTION_WORKERS).")
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new uploads instead of exiting when the queue is empty.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds to sleep between polls with --loop.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = process_resume_queue(limit=options['batch_size'], workers=options['workers'])
+            total += processed
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} resume(s)."))
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from userapp.notifications import prune_read_notifications
+
+
+class Command(BaseCommand):
+    help = "Delete or archive read notifications older than the retention period, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help="Retention in days (default: NOTIFICATION_RETENTION_DAYS).")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows removed per transaction.")
+        parser.add_argument('--archive', action='store_true', help="Move rows to ArchivedNotification instead of deleting them.")
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90)
+        removed = prune_read_notifications(days=days, batch_size=options['batch_size'], archive=options['archive'])
+        action = 'Archived' if options['archive'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f"{action} {removed} read notification(s) older than {days} day(s)."))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from userapp.notifications import send_job_alerts
+
+
+class Command(BaseCommand):
+    help = "Alert students whose skills match newly posted jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help="Jobs to handle per batch.")
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new jobs instead of exiting when none are pending.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep between polls with --loop.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            handled = send_job_alerts(limit=options['batch_size'])
+            total += handled
+            if handled:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Sent alerts for {total} job(s)."))
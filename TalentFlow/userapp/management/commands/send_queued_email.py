@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from userapp.outbox import send_queued_email
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outgoing email in batches over a single mail connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help="Emails to claim per batch.")
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new mail instead of exiting when the outbox is empty.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep between polls with --loop.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            sent = send_queued_email(limit=options['batch_size'])
+            total += sent
+            if sent:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Sent {total} email(s)."))
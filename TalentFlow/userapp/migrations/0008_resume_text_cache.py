@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:18
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_resume_hashes(apps, schema_editor):
+    for model_name in ('Profile', 'Application'):
+        model = apps.get_model('userapp', model_name)
+        for obj in model.objects.exclude(resume='').exclude(resume__isnull=True).iterator():
+            digest = hashlib.sha256()
+            try:
+                with obj.resume.open('rb') as f:
+                    for chunk in iter(lambda: f.read(65536), b''):
+                        digest.update(chunk)
+            except Exception:
+                continue
+            model.objects.filter(pk=obj.pk).update(resume_hash=digest.hexdigest())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0007_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='resume_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='resume_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='ResumeText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('extractor_version', models.PositiveSmallIntegerField(default=1)),
+                ('text', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('content_hash', 'extractor_version')},
+            },
+        ),
+        migrations.RunPython(backfill_resume_hashes, migrations.RunPython.noop),
+    ]
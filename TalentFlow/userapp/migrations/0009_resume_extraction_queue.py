@@ -0,0 +1,43 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0008_resume_text_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumetext',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='resumetext',
+            name='is_resume_like',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='resumetext',
+            name='source_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='resumetext',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='resumetext',
+            name='tokens',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.AddField(
+            model_name='resumetext',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('userapp', '0009_resume_extraction_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AtsScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0)),
+                ('matched_skills', models.TextField(default='[]')),
+                ('missing_skills', models.TextField(default='[]')),
+                ('used_resume', models.BooleanField(default=False)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ats_scores', to='userapp.job')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ats_scores', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='atsscore',
+            index=models.Index(fields=['user', '-score', '-job'], name='atsscore_user_score_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='atsscore',
+            unique_together={('user', 'job')},
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:25
+
+import json
+
+from django.db import migrations, models
+
+
+def _names(raw):
+    try:
+        names = json.loads(raw)
+    except (TypeError, ValueError):
+        return set()
+    if not isinstance(names, list):
+        return set()
+    return {' '.join(str(n).split()).lower()[:100] for n in names if n and str(n).strip()}
+
+
+def backfill_skill_sets(apps, schema_editor):
+    Skill = apps.get_model('userapp', 'Skill')
+    Profile = apps.get_model('userapp', 'Profile')
+    Job = apps.get_model('userapp', 'Job')
+
+    rows = [(p, _names(p.skills)) for p in Profile.objects.all()]
+    rows += [(j, _names(j.required_skills)) for j in Job.objects.all()]
+    vocabulary = set().union(*(names for _, names in rows)) if rows else set()
+    Skill.objects.bulk_create([Skill(name=n) for n in sorted(vocabulary)], ignore_conflicts=True)
+    ids = dict(Skill.objects.values_list('name', 'id'))
+    for obj, names in rows:
+        obj.skill_set.set([ids[n] for n in names])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0010_ats_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='skill_set',
+            field=models.ManyToManyField(blank=True, related_name='jobs', to='userapp.Skill'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='skill_set',
+            field=models.ManyToManyField(blank=True, related_name='profiles', to='userapp.Skill'),
+        ),
+        migrations.RunPython(backfill_skill_sets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:36
+
+import json
+
+from django.db import migrations
+
+# The alias table and normalization of userapp.skills as of this migration,
+# frozen here so later edits to the live table do not change what it does.
+SKILL_ALIASES = {
+    'javascript': ('js', 'ecmascript'),
+    'node.js': ('nodejs',),
+    'react': ('reactjs', 'react.js'),
+    'angular': ('angularjs', 'angular.js'),
+    'vue.js': ('vue', 'vuejs'),
+    'python': ('python3',),
+    'c++': ('cpp',),
+    'c#': ('csharp', 'c sharp'),
+    '.net': ('dotnet', 'dot net'),
+    'go': ('golang',),
+    'postgresql': ('postgres', 'psql'),
+    'mongodb': ('mongo',),
+    'sql server': ('mssql', 'ms sql'),
+    'html': ('html5',),
+    'css': ('css3',),
+    'aws': ('amazon web services',),
+    'gcp': ('google cloud', 'google cloud platform'),
+    'azure': ('microsoft azure',),
+    'kubernetes': ('k8s',),
+    'machine learning': ('ml',),
+    'artificial intelligence': ('ai',),
+    'natural language processing': ('nlp',),
+    'scikit-learn': ('sklearn', 'scikit learn'),
+    'tensorflow': ('tf',),
+    'ci/cd': ('cicd', 'ci cd'),
+}
+
+
+def normalize_skill_name(name):
+    return ' '.join(str(name).split()).lower()
+
+
+CANONICAL_NAMES = {}
+for _canonical, _aliases in SKILL_ALIASES.items():
+    CANONICAL_NAMES[normalize_skill_name(_canonical)] = normalize_skill_name(_canonical)
+    for _alias in _aliases:
+        CANONICAL_NAMES[normalize_skill_name(_alias)] = normalize_skill_name(_canonical)
+
+
+def canonical_skill_name(name):
+    normalized = normalize_skill_name(name)
+    return CANONICAL_NAMES.get(normalized, normalized)
+
+
+def _names(raw):
+    try:
+        names = json.loads(raw)
+    except (TypeError, ValueError):
+        return set()
+    if not isinstance(names, list):
+        return set()
+    return {canonical_skill_name(n)[:100] for n in names if n and str(n).strip()}
+
+
+def rebuild_skill_sets(apps, schema_editor):
+    """Re-link profiles and jobs to canonical skills and drop the alias rows left unused."""
+    Skill = apps.get_model('userapp', 'Skill')
+    Profile = apps.get_model('userapp', 'Profile')
+    Job = apps.get_model('userapp', 'Job')
+
+    rows = [(p, _names(p.skills)) for p in Profile.objects.all()]
+    rows += [(j, _names(j.required_skills)) for j in Job.objects.all()]
+    vocabulary = set().union(*(names for _, names in rows)) if rows else set()
+    Skill.objects.bulk_create([Skill(name=n) for n in sorted(vocabulary)], ignore_conflicts=True)
+    ids = dict(Skill.objects.values_list('name', 'id'))
+    for obj, names in rows:
+        obj.skill_set.set([ids[n] for n in names])
+    Skill.objects.filter(profiles__isnull=True, jobs__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0014_notification_retention'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_skill_sets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:37
+
+import json
+
+from django.db import migrations, models
+
+
+def _clean(raw, kind):
+    """Valid JSON text of type `kind` for a legacy column value.
+
+    Unparseable text (e.g. a comma-separated string saved by the old
+    upload_resume view) is split on commas for list columns.
+    """
+    if raw is None or not str(raw).strip():
+        return json.dumps(kind())
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = [s.strip() for s in str(raw).split(',') if s.strip()] if kind is list else kind()
+    if not isinstance(value, kind):
+        value = kind()
+    return json.dumps(value)
+
+
+def normalize_json_columns(apps, schema_editor):
+    """Rewrite invalid JSON text so the columns can be converted to JSONField."""
+    columns = {
+        'Profile': {'skills': list, 'certifications': list, 'other_links': dict},
+        'Job': {'required_skills': list, 'required_certifications': list},
+    }
+    for model_name, fields in columns.items():
+        model = apps.get_model('userapp', model_name)
+        for row in model.objects.values('pk', *fields):
+            changes = {}
+            for name, kind in fields.items():
+                cleaned = _clean(row[name], kind)
+                if cleaned != row[name]:
+                    changes[name] = cleaned
+            if changes:
+                model.objects.filter(pk=row['pk']).update(**changes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0015_canonical_skill_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_json_columns, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='job',
+            name='required_certifications',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='required_skills',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='certifications',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='other_links',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='skills',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:12
+
+from django.db import migrations
+
+from userapp.fts import create_fts_index, drop_fts_index
+
+# External-content FTS5 table over the searchable Job columns, kept in step by
+# triggers (see userapp.fts). SQLite only; other databases (or SQLite builds
+# without FTS5) use the in-process index in userapp.search.
+
+
+def create_job_fts(apps, schema_editor):
+    create_fts_index(schema_editor.connection, 'userapp_job_fts')
+
+
+def drop_job_fts(apps, schema_editor):
+    drop_fts_index(schema_editor.connection, 'userapp_job_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0016_json_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_job_fts, drop_job_fts),
+    ]
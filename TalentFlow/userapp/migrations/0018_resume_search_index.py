@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:05
+
+from django.db import migrations
+
+from userapp.fts import create_fts_index, drop_fts_index
+
+# External-content FTS5 table over extracted resume text, kept in step by
+# triggers (see userapp.fts), so a resume is searchable as soon as extraction
+# stores its text. SQLite only; elsewhere userapp.resume_search evaluates
+# queries in Python over the stored text of the recruiter's applicants.
+
+
+def create_resume_fts(apps, schema_editor):
+    create_fts_index(schema_editor.connection, 'userapp_resumetext_fts')
+
+
+def drop_resume_fts(apps, schema_editor):
+    drop_fts_index(schema_editor.connection, 'userapp_resumetext_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0017_job_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_resume_fts, drop_resume_fts),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+from userapp.fts import create_fts_index
+
+# Adding (or removing) a column makes SQLite rebuild userapp_resumetext, which
+# drops the triggers 0018 put on it; put them back (FTS5 builds only).
+
+
+def restore_resume_fts_triggers(apps, schema_editor):
+    create_fts_index(schema_editor.connection, 'userapp_resumetext_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0019_index_version'),
+    ]
+
+    operations = [
+        # restores the triggers after RemoveField when unapplied
+        migrations.RunPython(migrations.RunPython.noop, restore_resume_fts_triggers),
+        migrations.AddField(
+            model_name='resumetext',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(restore_resume_fts_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:20
+
+from django.db import migrations
+
+
+def drop_stored_scores(apps, schema_editor):
+    """Scores stored so far counted short spellings ("ai", "go") found in resumes; recompute them."""
+    apps.get_model('userapp', 'AtsScore').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0020_resume_text_claim'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_stored_scores, migrations.RunPython.noop),
+    ]
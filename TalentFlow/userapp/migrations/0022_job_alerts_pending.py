@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:36
+
+from django.db import migrations, models
+
+# SQLite rebuilds userapp_job for the new column; the post_migrate handler in
+# userapp.signals puts the job search triggers back.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0021_rescore_short_skill_spellings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='alerts_pending',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:39
+
+from django.db import migrations
+
+# Nothing read the stored tokens. SQLite rebuilds userapp_resumetext without the
+# column; the post_migrate handler in userapp.signals puts the resume search
+# triggers back.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0022_job_alerts_pending'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='resumetext',
+            name='tokens',
+        ),
+    ]
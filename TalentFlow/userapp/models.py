@@ -1,6 +1,42 @@
 import json
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .skills import canonical_skill_name, remember_skill_rows
+
+
+def _json_value(value, kind):
+    """`value` as a `kind` (list or dict), decoding legacy JSON strings; empty if unusable."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return kind()
+    return value if isinstance(value, kind) else kind()
+
+
+class Skill(models.Model):
+    """Canonical skill vocabulary shared by profiles and jobs."""
+    name = models.CharField(max_length=100, unique=True)
+
+    @classmethod
+    def for_names(cls, names):
+        """Return Skill rows for the given raw names (aliases collapsed), creating missing ones."""
+        normalized = {canonical_skill_name(n)[:100] for n in names if n and str(n).strip()}
+        if not normalized:
+            return []
+        existing = set(cls.objects.filter(name__in=normalized).values_list('name', flat=True))
+        cls.objects.bulk_create(
+            [cls(name=n) for n in normalized - existing], ignore_conflicts=True
+        )
+        rows = list(cls.objects.filter(name__in=normalized))
+        remember_skill_rows(rows)
+        return rows
+
+    def __str__(self):
+        return self.name
+
 
 class Profile(models.Model):
     USER_TYPES = [
@@ -13,34 +49,33 @@ class Profile(models.Model):
     location = models.CharField(max_length=100, blank=True)
     website = models.URLField(blank=True)
     headline = models.CharField(max_length=255, blank=True)
-    skills = models.TextField(default='[]')  # JSON string
+    skills = models.JSONField(default=list, blank=True)  # list of skill names
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
     cgpa = models.FloatField(default=0)
     experience = models.FloatField(default=0)
-    certifications = models.TextField(default='[]')  # JSON string
-    other_links = models.TextField(default='{}')  # JSON string storing dict of links
+    certifications = models.JSONField(default=list, blank=True)  # list of certification names
+    other_links = models.JSONField(default=dict, blank=True)  # dict of link name -> url
     resume = models.FileField(upload_to='resumes/', blank=True, null=True)
+    resume_hash = models.CharField(max_length=64, blank=True, default='')  # sha256 of resume content
+    skill_set = models.ManyToManyField(Skill, blank=True, related_name='profiles')  # indexed copy of `skills`
 
     def get_skills(self):
-        return json.loads(self.skills)
+        return _json_value(self.skills, list)
 
     def set_skills(self, skills_list):
-        self.skills = json.dumps(skills_list)
+        self.skills = list(skills_list)
 
     def get_certifications(self):
-        return json.loads(self.certifications)
+        return _json_value(self.certifications, list)
 
     def set_certifications(self, cert_list):
-        self.certifications = json.dumps(cert_list)
+        self.certifications = list(cert_list)
 
     def get_links(self):
-        try:
-            return json.loads(self.other_links)
-        except Exception:
-            return {}
+        return _json_value(self.other_links, dict)
 
     def set_links(self, links_dict):
-        self.other_links = json.dumps(links_dict)
+        self.other_links = dict(links_dict)
 
     def __str__(self):
         return f"{self.user.username} Profile"
@@ -50,17 +85,19 @@ class Job(models.Model):
     recruiter = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     title = models.CharField(max_length=200)
     description = models.TextField()
-    required_skills = models.TextField(default='[]')  # JSON string
+    required_skills = models.JSONField(default=list, blank=True)  # list of skill names
     min_cgpa = models.FloatField(default=0)
     min_experience = models.FloatField(default=0)
-    required_certifications = models.TextField(default='[]')  # JSON string
+    required_certifications = models.JSONField(default=list, blank=True)  # list of certification names
     application_link = models.URLField(blank=True, default='')
+    skill_set = models.ManyToManyField(Skill, blank=True, related_name='jobs')  # indexed copy of `required_skills`
+    alerts_pending = models.BooleanField(default=False, db_index=True)  # matching students not yet alerted
 
     def get_required_skills(self):
-        return json.loads(self.required_skills)
+        return _json_value(self.required_skills, list)
 
     def get_required_certifications(self):
-        return json.loads(self.required_certifications)
+        return _json_value(self.required_certifications, list)
 
 
 class Application(models.Model):
@@ -68,6 +105,7 @@ class Application(models.Model):
     job = models.ForeignKey(Job, on_delete=models.CASCADE)
     applied_at = models.DateTimeField(auto_now_add=True)
     resume = models.FileField(upload_to='application_resumes/', blank=True, null=True)
+    resume_hash = models.CharField(max_length=64, blank=True, default='')  # sha256 of resume content
     status = models.CharField(max_length=20, default='applied')  # 'applied' or 'withdrawn'
     withdrawn_at = models.DateTimeField(blank=True, null=True)
 
@@ -80,5 +118,141 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'read', 'created_at'], name='notif_user_read_created_idx'),
+            # inbox: newest first, keyset-paginated on (created_at, id)
+            models.Index(fields=['user', '-created_at', '-id'], name='notif_user_created_idx'),
+        ]
+
     def __str__(self):
         return f"Notification({self.user.username}): {self.message[:20]}"
+
+
+class ArchivedNotification(models.Model):
+    """Read notification moved out of the inbox by the prune_notifications command."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    message = models.TextField()
+    url = models.CharField(max_length=500, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"ArchivedNotification({self.user_id}): {self.message[:20]}"
+
+
+class ResumeText(models.Model):
+    """Text extracted from a resume file, keyed by the file's content hash.
+
+    Rows are content-addressed, so identical uploads share one row and a
+    replaced resume simply hashes to a different key. Rows start out pending
+    and are filled in by the process_resume_queue worker.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    content_hash = models.CharField(max_length=64)
+    extractor_version = models.PositiveSmallIntegerField(default=1)
+    source_name = models.CharField(max_length=255, blank=True)  # storage name of the file to extract
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    claimed_at = models.DateTimeField(null=True, blank=True)  # set while a worker extracts the row
+    text = models.TextField(blank=True)
+    is_resume_like = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('content_hash', 'extractor_version')
+
+    def __str__(self):
+        return f"ResumeText({self.content_hash[:12]}, v{self.extractor_version})"
+
+
+class AtsScore(models.Model):
+    """Materialized ATS score of a student against a job.
+
+    Rows are deleted by signals whenever an input to the score changes and are
+    recomputed in bulk the next time a page needs them (see
+    utils.ensure_ats_scores) or by the fill_ats_scores command.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ats_scores')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='ats_scores')
+    score = models.FloatField(default=0)
+    matched_skills = models.TextField(default='[]')  # JSON string
+    missing_skills = models.TextField(default='[]')  # JSON string
+    used_resume = models.BooleanField(default=False)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'job')
+        indexes = [
+            models.Index(fields=['user', '-score', '-job'], name='atsscore_user_score_idx'),
+        ]
+
+    def get_matched_skills(self):
+        return json.loads(self.matched_skills)
+
+    def get_missing_skills(self):
+        return json.loads(self.missing_skills)
+
+    def __str__(self):
+        return f"AtsScore({self.user_id}, {self.job_id}): {self.score}"
+
+
+class OutgoingEmail(models.Model):
+    """Email waiting in the outbox.
+
+    Views queue mail here instead of talking to the mail server; the
+    send_queued_email worker delivers it in batches and retries failures.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, blank=True)
+    recipients = models.TextField(default='[]')  # JSON string
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
+
+    def get_recipients(self):
+        return json.loads(self.recipients) if self.recipients else []
+
+    def __str__(self):
+        return f"OutgoingEmail({self.subject[:20]}, {self.status})"
+
+
+class IndexVersion(models.Model):
+    """Version counter of an in-process index, shared by every process.
+
+    Writers bump the counter; each process compares it with the version of
+    the index it holds and rebuilds on a mismatch.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"IndexVersion({self.name}, {self.version})"
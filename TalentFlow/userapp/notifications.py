@@ -0,0 +1,148 @@
+"""Notification fan-out and per-user unread notification counts.
+
+The unread count shown in every page header is one COUNT answered from the
+(user, read, created_at) index alone, so it is current in every process
+without a shared cache.
+
+`notify_users` creates notifications for many users at once with chunked
+bulk inserts; the helpers below it pick the recipients for common events.
+Alerts for a newly posted job are fanned out by the send_job_alerts worker,
+not in the recruiter's request.
+`prune_read_notifications` enforces the retention policy.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.urls import reverse
+from django.utils import timezone
+
+NOTIFY_CHUNK_SIZE = 500
+
+
+def unread_count(user):
+    """Number of unread notifications for `user` (a User or a user id)."""
+    from .models import Notification
+    return Notification.objects.filter(user_id=getattr(user, 'pk', user), read=False).count()
+
+
+def mark_all_read(user):
+    """Mark every unread notification of `user` as read."""
+    from .models import Notification
+    Notification.objects.filter(user=user, read=False).update(read=True)
+
+
+def notify_users(users, message, url='', chunk_size=NOTIFY_CHUNK_SIZE):
+    """Notify every distinct user in `users` (Users or ids); returns the number of rows created.
+
+    Users who still have an identical unread notification are skipped, so
+    repeating an event does not pile up duplicates. Rows are inserted with
+    one bulk INSERT per chunk.
+    """
+    from .models import Notification
+
+    user_ids = list(dict.fromkeys(getattr(u, 'pk', u) for u in users if u is not None))
+    created = 0
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        with transaction.atomic():
+            existing = set(Notification.objects.filter(
+                user_id__in=chunk, read=False, message=message, url=url
+            ).values_list('user_id', flat=True))
+            rows = [Notification(user_id=uid, message=message, url=url) for uid in chunk if uid not in existing]
+            Notification.objects.bulk_create(rows)
+        created += len(rows)
+    return created
+
+
+def notify_applicants(job, message, url=''):
+    """Notify everyone with an active application to `job` (e.g. when it changes or closes)."""
+    from .models import Application
+
+    user_ids = Application.objects.filter(job=job).exclude(status='withdrawn').values_list('user_id', flat=True)
+    return notify_users(user_ids, message, url or reverse('view_job', args=[job.id]))
+
+
+def notify_matching_students(job, min_matched=None):
+    """Alert students sharing at least `min_matched` skills with a newly posted job."""
+    from .models import Profile
+
+    if min_matched is None:
+        min_matched = getattr(settings, 'JOB_ALERT_MIN_MATCHED_SKILLS', 1)
+    skill_ids = list(job.skill_set.values_list('id', flat=True))
+    if not skill_ids:
+        return 0
+    user_ids = (
+        Profile.objects.filter(user_type='student', skill_set__in=skill_ids)
+        .exclude(user_id=job.recruiter_id)
+        .values('user_id')
+        .annotate(matched=Count('skill_set'))
+        .filter(matched__gte=min_matched)
+        .values_list('user_id', flat=True)
+    )
+    return notify_users(
+        user_ids,
+        f"New job matching your skills: '{job.title}'",
+        reverse('view_job', args=[job.id]),
+    )
+
+
+def send_job_alerts(limit=50, ids=None):
+    """Alert the matching students of up to `limit` jobs still flagged `alerts_pending`.
+
+    Returns the number of jobs handled. The flag is cleared after the fan-out,
+    so a worker that dies midway leaves the job to the next run; notify_users
+    skips students already alerted.
+    """
+    from .models import Job
+
+    jobs = Job.objects.filter(alerts_pending=True)
+    if ids is not None:
+        jobs = jobs.filter(pk__in=ids)
+    jobs = list(jobs.order_by('id')[:limit])
+    for job in jobs:
+        notify_matching_students(job)
+        Job.objects.filter(pk=job.pk).update(alerts_pending=False)
+    return len(jobs)
+
+
+def queue_job_alerts(job):
+    """Flag `job` for send_job_alerts (once the posting transaction commits when eager)."""
+    from .models import Job
+
+    if not job.alerts_pending:
+        Job.objects.filter(pk=job.pk).update(alerts_pending=True)
+        job.alerts_pending = True
+    if getattr(settings, 'JOB_ALERTS_EAGER', False):
+        transaction.on_commit(lambda: send_job_alerts(ids=[job.pk]))
+
+
+def prune_read_notifications(days=None, batch_size=1000, archive=False):
+    """Delete (or move to ArchivedNotification) read notifications older than `days`.
+
+    Works in batches of `batch_size` rows, each in its own short transaction,
+    so a large backlog never holds a long write lock. Unread notifications
+    are always kept. Returns the number of rows removed from the inbox.
+    """
+    from .models import ArchivedNotification, Notification
+
+    if days is None:
+        days = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90)
+    cutoff = timezone.now() - timedelta(days=days)
+    removed = 0
+    while True:
+        with transaction.atomic():
+            batch = list(Notification.objects.filter(
+                read=True, created_at__lt=cutoff
+            ).order_by('id')[:batch_size])
+            if not batch:
+                break
+            if archive:
+                ArchivedNotification.objects.bulk_create([
+                    ArchivedNotification(user_id=n.user_id, message=n.message, url=n.url, created_at=n.created_at)
+                    for n in batch
+                ])
+            Notification.objects.filter(pk__in=[n.pk for n in batch]).delete()
+        removed += len(batch)
+    return removed
@@ -0,0 +1,119 @@
+"""Durable outbox for outgoing email.
+
+Views call `queue_email`, which only inserts an OutgoingEmail row, so a
+request never waits on the mail server. The send_queued_email worker
+delivers due rows in batches over a single backend connection and retries
+failures with exponential backoff.
+"""
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+
+def queue_email(subject, body, recipients, from_email=None):
+    """Queue one email; returns the OutgoingEmail row, or None without recipients.
+
+    With settings.EMAIL_OUTBOX_EAGER the message is delivered immediately
+    (useful for local development without a worker).
+    """
+    from .models import OutgoingEmail
+
+    recipients = [r for r in recipients if r]
+    if not recipients:
+        return None
+    row = OutgoingEmail.objects.create(
+        subject=subject[:255],
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=json.dumps(recipients),
+    )
+    if getattr(settings, 'EMAIL_OUTBOX_EAGER', False):
+        send_queued_email(ids=[row.pk])
+    return row
+
+
+def _claim(limit, ids=None):
+    """Mark up to `limit` due rows as sending and return them.
+
+    The conditional UPDATE makes concurrent workers claim disjoint rows. Rows
+    left in `sending` by a worker that died are picked up again after
+    EMAIL_OUTBOX_LEASE seconds.
+    """
+    from .models import OutgoingEmail
+
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_LEASE', 600))
+    due = (
+        Q(status=OutgoingEmail.STATUS_PENDING, next_attempt_at__lte=now)
+        | Q(status=OutgoingEmail.STATUS_SENDING, claimed_at__lt=now - lease)
+    )
+    candidates = OutgoingEmail.objects.filter(due)
+    if ids is not None:
+        candidates = candidates.filter(pk__in=ids)
+    candidate_ids = list(candidates.order_by('next_attempt_at', 'id').values_list('id', flat=True)[:limit])
+    if not candidate_ids:
+        return []
+    OutgoingEmail.objects.filter(due, pk__in=candidate_ids).update(
+        status=OutgoingEmail.STATUS_SENDING, claimed_at=now
+    )
+    return list(OutgoingEmail.objects.filter(
+        pk__in=candidate_ids, status=OutgoingEmail.STATUS_SENDING, claimed_at=now
+    ).order_by('id'))
+
+
+def _failed(row, error, now):
+    from .models import OutgoingEmail
+
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    delay = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+    row.attempts += 1
+    row.last_error = str(error)[:1000]
+    if row.attempts >= max_attempts:
+        row.status = OutgoingEmail.STATUS_FAILED
+    else:
+        row.status = OutgoingEmail.STATUS_PENDING
+        row.next_attempt_at = now + timedelta(seconds=delay * 2 ** (row.attempts - 1))
+    row.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def send_queued_email(limit=100, ids=None):
+    """Deliver up to `limit` due emails over one connection; returns how many were sent."""
+    from .models import OutgoingEmail
+
+    rows = _claim(limit, ids)
+    if not rows:
+        return 0
+
+    connection = get_connection()
+    now = timezone.now()
+    try:
+        connection.open()
+    except Exception as exc:
+        for row in rows:
+            _failed(row, exc, now)
+        return 0
+
+    sent_ids = []
+    try:
+        for row in rows:
+            message = EmailMessage(
+                row.subject, row.body, row.from_email, row.get_recipients(), connection=connection
+            )
+            try:
+                # one message per call so a rejected message does not fail the batch
+                connection.send_messages([message])
+            except Exception as exc:
+                _failed(row, exc, now)
+            else:
+                sent_ids.append(row.pk)
+    finally:
+        connection.close()
+
+    OutgoingEmail.objects.filter(pk__in=sent_ids).update(
+        status=OutgoingEmail.STATUS_SENT, sent_at=timezone.now(), last_error=''
+    )
+    return len(sent_ids)
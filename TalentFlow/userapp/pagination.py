@@ -0,0 +1,120 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _json_default(value):
+    # full-precision isoformat (DjangoJSONEncoder would truncate microseconds)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode_cursor(values):
+    raw = json.dumps(values, default=_json_default).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, converters):
+    """Return the key values in a cursor, each passed through its converter, or None if malformed.
+
+    `converters` has one callable per sort key (e.g. the model field's
+    to_python), so a tampered cursor falls back to the first page instead of
+    reaching the query as a value of the wrong type.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception:
+        return None
+    if not isinstance(values, list) or len(values) != len(converters):
+        return None
+    try:
+        values = [convert(value) for convert, value in zip(converters, values)]
+    except (ValidationError, ValueError, TypeError):
+        return None
+    if any(value is None for value in values):
+        return None
+    return values
+
+
+def _after(ordering, values):
+    """Q selecting rows that sort strictly after `values` under `ordering`."""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        op = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f"{name}__{op}": values[i]})
+        for prev_field, prev_value in zip(ordering[:i], values[:i]):
+            step &= Q(**{prev_field.lstrip('-'): prev_value})
+        condition |= step
+    return condition
+
+
+def get_page_size(request, default=DEFAULT_PAGE_SIZE):
+    try:
+        size = int(request.GET.get('page_size', default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+class KeysetPage:
+    """One page of a keyset-paginated listing."""
+
+    def __init__(self, items, next_cursor, page_size, cursor, querystring=''):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.page_size = page_size
+        self.cursor = cursor
+        # other GET parameters (filters, ordering) to carry over to page links
+        self.querystring = querystring
+
+    @property
+    def has_next(self):
+        return bool(self.next_cursor)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_paginate(request, queryset, ordering=('-id',)):
+    """Return the page of `queryset` selected by ?cursor= and ?page_size=.
+
+    `ordering` lists the sort fields; the last one must be unique (usually the
+    primary key) so the order is total and pages never overlap or skip rows.
+    Only page_size + 1 rows are fetched regardless of table size.
+    """
+    ordering = tuple(ordering)
+    page_size = get_page_size(request)
+    cursor = request.GET.get('cursor') or ''
+    converters = [queryset.model._meta.get_field(field.lstrip('-')).to_python for field in ordering]
+    values = _decode_cursor(cursor, converters) if cursor else None
+
+    qs = queryset.order_by(*ordering)
+    if values is not None:
+        qs = qs.filter(_after(ordering, values))
+    else:
+        cursor = ''
+
+    rows = list(qs[:page_size + 1])
+    next_cursor = ''
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = _encode_cursor([
+            getattr(last, field.lstrip('-')) for field in ordering
+        ])
+
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    params.pop('page_size', None)
+    return KeysetPage(rows, next_cursor, page_size, cursor, params.urlencode())
@@ -0,0 +1,185 @@
+"""Top-K job recommendations for a student without scoring every job.
+
+`JobIndex` keeps, for every skill, the posting list of jobs requiring it,
+sorted by how many skills the job requires (a matched skill is worth
+40 / n points, so short lists of requirements come first). `recommend_jobs`
+walks the posting lists of the student's skills (profile skills and skills
+found in the resume) until the K-th best score beats the best score any job
+not yet reached could still get. A job reached is scored exactly, in small
+blocks, unless its own bound (shared skills counted on the skill bitsets)
+already rules it out.
+Jobs sharing no skill with the student can only earn the CGPA, experience and
+certification points and are visited last, best bound first.
+
+The index is built once per process and rebuilt after any job is saved or
+deleted (see signals.rebuild_job_index): the job index version is a counter
+row in the database, so every process sees the change.
+"""
+import heapq
+import threading
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .batch_scoring import _resume_skill_ids
+from .skills import mask_skill_ids, popcount, skill_forms, skill_ids, skill_mask, skill_name
+from .utils import ScoringProfile, score_profile_against_jobs
+
+JOB_INDEX = 'jobs'
+# jobs scored per call into the scoring engine
+SCORE_BLOCK = 32
+_index = None
+_index_lock = threading.Lock()
+
+
+class JobIndex:
+    """Posting lists and score bounds for every job, built from one query."""
+
+    def __init__(self, jobs, version=None):
+        self.version = version
+        self.jobs = {}
+        self.masks = {}
+        self.other_bounds = {}
+        self.postings = {}
+        for job in jobs:
+            ids = skill_ids(job.get_required_skills() or [])
+            self.jobs[job.pk] = job
+            self.masks[job.pk] = skill_mask(ids)
+            for sid in ids:
+                self.postings.setdefault(sid, []).append((len(ids), -job.pk))
+            # what the job can give a student whose skills it does not share
+            self.other_bounds[job.pk] = (
+                (30 if job.min_cgpa else 0) + (20 if job.min_experience else 0)
+                + (10 if job.get_required_certifications() else 0)
+            )
+        for entries in self.postings.values():
+            entries.sort()
+        self.by_other_bound = sorted(((bound, pk) for pk, bound in self.other_bounds.items()), reverse=True)
+        # most CGPA + experience + certification points any job gives
+        self.max_other_bound = self.by_other_bound[0][0] if self.by_other_bound else 0
+        self.resume_forms = tuple(sorted(
+            form
+            for sid in self.postings if len(skill_name(sid)) > 2
+            for form in skill_forms(sid)
+        ))
+
+    @classmethod
+    def build(cls, version=None):
+        from .models import Job
+        fields = ('id', 'title', 'required_skills', 'required_certifications', 'min_cgpa', 'min_experience')
+        return cls(Job.objects.only(*fields).iterator(), version)
+
+
+def job_index_version():
+    """Counter bumped whenever a job is saved or deleted, read from the database.
+
+    One primary-key-sized query; every process reads the same row, so a job
+    changed by any worker makes all of them rebuild their indexes.
+    """
+    from .models import IndexVersion
+    return IndexVersion.objects.filter(name=JOB_INDEX).values_list('version', flat=True).first() or 0
+
+
+def get_job_index():
+    """The process-wide JobIndex, rebuilt when the jobs changed since it was built."""
+    global _index
+    version = job_index_version()
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = JobIndex.build(version)
+            index = _index
+    return index
+
+
+def invalidate_job_index():
+    """Make every process rebuild its job indexes on next use."""
+    from .models import IndexVersion
+    if IndexVersion.objects.filter(name=JOB_INDEX).update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            IndexVersion.objects.create(name=JOB_INDEX, version=1)
+    except IntegrityError:
+        # another process created the row first
+        IndexVersion.objects.filter(name=JOB_INDEX).update(version=F('version') + 1)
+
+
+def _skill_bound(skill_count, job_skill_count):
+    """Most skill points a job needing `job_skill_count` skills gives `skill_count` matching skills."""
+    return min(skill_count, job_skill_count) / job_skill_count * 40
+
+
+def recommend_jobs(profile, k=10, index=None):
+    """The `k` best scoring jobs for `profile`, best first.
+
+    Returns a list of dicts with job, score, matched and missing, the same
+    values score_profile_against_jobs gives; ties go to the newer job.
+    """
+    if k < 1:
+        return []
+    index = index or get_job_index()
+    snapshot = ScoringProfile.from_profile(profile)
+    _, found = _resume_skill_ids(snapshot, index.resume_forms)
+    student_mask = snapshot.skill_mask | skill_mask(found)
+    student_skills = mask_skill_ids(student_mask)
+    skill_count = len(student_skills)
+
+    best = []  # min-heap of (score, job pk, result) holding the k best so far
+    seen = set()
+
+    def score(block):
+        if not block:
+            return
+        results = score_profile_against_jobs(snapshot, [index.jobs[pk] for pk in block])
+        for pk in block:
+            entry = (results[pk]['score'], pk, results[pk])
+            if len(best) < k:
+                heapq.heappush(best, entry)
+            elif entry[:2] > best[0][:2]:
+                heapq.heapreplace(best, entry)
+
+    def beaten(bound):
+        # scores are rounded to 2 places, so a job can show up to 0.005 over its bound
+        return len(best) == k and bound + 0.01 < best[0][0]
+
+    def full(block):
+        # score the first k candidates at once so the bounds start pruning early
+        return len(block) >= SCORE_BLOCK or (len(best) < k <= len(best) + len(block))
+
+    # jobs sharing a skill with the student, fewest required skills first
+    block = []
+    postings = heapq.merge(*(index.postings[sid] for sid in student_skills if sid in index.postings))
+    for job_skill_count, neg_pk in postings:
+        pk = -neg_pk
+        if pk in seen:
+            continue
+        if full(block):
+            score(block)
+            block = []
+        if beaten(_skill_bound(skill_count, job_skill_count) + index.max_other_bound):
+            break
+        seen.add(pk)
+        shared = popcount(student_mask & index.masks[pk])
+        if not beaten(_skill_bound(shared, job_skill_count) + index.other_bounds[pk]):
+            block.append(pk)
+    score(block)
+
+    # every other job scores no skill points at all
+    block = []
+    for bound, pk in index.by_other_bound:
+        if pk in seen:
+            continue
+        if full(block):
+            score(block)
+            block = []
+        if beaten(bound):
+            break
+        block.append(pk)
+    score(block)
+
+    return [
+        {'job': index.jobs[pk], 'score': value, 'matched': result['matched'], 'missing': result['missing']}
+        for value, pk, result in sorted(best, key=lambda entry: entry[:2], reverse=True)
+    ]
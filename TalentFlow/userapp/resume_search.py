@@ -0,0 +1,328 @@
+"""Full-text search over applicants' resumes for recruiters.
+
+Queries accept words, "quoted phrases", a trailing * for prefixes, AND, OR,
+NOT (or a leading -) and parentheses; words side by side must all match.
+`search_resumes` only looks at resumes attached to the recruiter's own
+active applications (or the applicant's profile resume when the application
+has none), and returns ranked hits with a highlighted snippet.
+
+On SQLite the userapp_resumetext_fts FTS5 table (migration 0018) answers the
+query; triggers keep it in step with ResumeText, so a resume is searchable
+once its text is extracted. Elsewhere the parsed query is evaluated in
+Python over the stored text of those applicants' resumes only.
+"""
+import re
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection
+
+from .search import fold, fts_available, tokenize
+from .utils import EXTRACTOR_VERSION
+
+# FTS5 snippet() markers; control characters never present in extracted text
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+SNIPPET_TOKENS = 16
+# content hashes per SQL query, well under SQLite's variable limit
+HASH_CHUNK = 500
+
+_QUERY_TOKEN_RE = re.compile(r'"([^"]*)"?|([()])|([^\s()"]+)')
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+class QueryError(ValueError):
+    """A search query that cannot be run, e.g. one that only excludes words."""
+
+
+# ==========================
+# QUERY PARSING
+# ==========================
+# Parsed queries are tuples: ('phrase', words, prefix), ('and', children),
+# ('or', children) and ('not', child).
+
+def _lex(query):
+    for match in _QUERY_TOKEN_RE.finditer(query):
+        phrase, paren, word = match.groups()
+        if phrase is not None:
+            yield ('text', phrase)
+        elif paren:
+            yield (paren, None)
+        elif word in ('AND', 'OR', 'NOT'):
+            yield (word, None)
+        elif word.startswith('-') and len(word) > 1:
+            yield ('NOT', None)
+            yield ('text', word[1:])
+        else:
+            yield ('text', word)
+
+
+class _Parser:
+    def __init__(self, query):
+        self.tokens = list(_lex(query))
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.expr()
+        while self.pos < len(self.tokens):
+            # a stray ")" ends the expression early; keep what follows, ANDed
+            self.take()
+            rest = self.expr()
+            if rest is not None:
+                node = rest if node is None else ('and', [node, rest])
+        return node
+
+    def expr(self):
+        children = []
+        node = self.and_expr()
+        if node is not None:
+            children.append(node)
+        while self.peek() == 'OR':
+            self.take()
+            node = self.and_expr()
+            if node is not None:
+                children.append(node)
+        return _group('or', children)
+
+    def and_expr(self):
+        children = []
+        while self.peek() not in (None, 'OR', ')'):
+            if self.peek() == 'AND':
+                self.take()
+                continue
+            node = self.unary()
+            if node is not None:
+                children.append(node)
+        return _group('and', children)
+
+    def unary(self):
+        kind = self.peek()
+        if kind == 'NOT':
+            self.take()
+            if self.peek() in (None, 'OR', ')', 'AND'):
+                return None
+            child = self.unary()
+            return ('not', child) if child is not None else None
+        if kind == '(':
+            self.take()
+            node = self.expr()
+            if self.peek() == ')':
+                self.take()
+            return node
+        _, text = self.take()
+        prefix = text.endswith('*')
+        words = tuple(tokenize(text.rstrip('*')))
+        return ('phrase', words, prefix) if words else None
+
+
+def _group(kind, children):
+    if not children:
+        return None
+    return children[0] if len(children) == 1 else (kind, children)
+
+
+def parse_query(query):
+    """Parse a recruiter's query; None when it has no searchable words."""
+    return _Parser(query or '').parse()
+
+
+def to_fts(node):
+    """FTS5 MATCH expression for a parsed query."""
+    kind = node[0]
+    if kind == 'phrase':
+        return '"%s"%s' % (' '.join(node[1]), '*' if node[2] else '')
+    if kind == 'not':
+        raise QueryError("NOT needs words to match as well as words to exclude.")
+    if kind == 'or':
+        return '(%s)' % ' OR '.join(to_fts(child) for child in node[1])
+    include = [child for child in node[1] if child[0] != 'not']
+    exclude = [child[1] for child in node[1] if child[0] == 'not']
+    if not include:
+        raise QueryError("NOT needs words to match as well as words to exclude.")
+    expression = '(%s)' % ' AND '.join(to_fts(child) for child in include)
+    for child in exclude:
+        expression = '(%s NOT %s)' % (expression, to_fts(child))
+    return expression
+
+
+# ==========================
+# PYTHON EVALUATION (no FTS5)
+# ==========================
+class _Document:
+    """Folded words of a text with their character spans."""
+
+    def __init__(self, text):
+        self.text = text
+        self.words = []
+        self.spans = []
+        self.positions = {}
+        for match in _WORD_RE.finditer(text):
+            word = fold(match.group())
+            self.positions.setdefault(word, []).append(len(self.words))
+            self.words.append(word)
+            self.spans.append(match.span())
+
+    def phrase_hits(self, words, prefix):
+        """Word index of every occurrence of a phrase (last word as a prefix if `prefix`)."""
+        last = len(words) - 1
+        if last == 0 and prefix:
+            starts = sorted(i for word, found in self.positions.items() if word.startswith(words[0]) for i in found)
+        else:
+            starts = self.positions.get(words[0], [])
+        hits = []
+        for start in starts:
+            if start + last >= len(self.words):
+                continue
+            if all(
+                self.words[start + i].startswith(w) if (prefix and i == last) else self.words[start + i] == w
+                for i, w in enumerate(words[1:], 1)
+            ):
+                hits.append(start)
+        return hits
+
+
+def _evaluate(node, doc, hits):
+    """Whether `doc` matches; the phrase hits that made it match are appended to `hits`."""
+    kind = node[0]
+    if kind == 'phrase':
+        found = doc.phrase_hits(node[1], node[2])
+        hits.extend((start, len(node[1])) for start in found)
+        return bool(found)
+    if kind == 'not':
+        return not _evaluate(node[1], doc, [])
+    if kind == 'and':
+        matched = []
+        for child in node[1]:
+            if not _evaluate(child, doc, matched):
+                return False
+        hits.extend(matched)
+        return True
+    return any([_evaluate(child, doc, hits) for child in node[1]])
+
+
+def _python_snippet(doc, hits):
+    """Snippet around the first hit, highlighted with the FTS5 markers."""
+    first = min(start for start, _ in hits)
+    lo = max(0, first - SNIPPET_TOKENS // 4)
+    hi = min(len(doc.words), lo + SNIPPET_TOKENS)
+    marked = set()
+    for start, length in hits:
+        marked.update(range(start, start + length))
+    parts = ['…'] if lo > 0 else []
+    cursor = doc.spans[lo][0]
+    for i in range(lo, hi):
+        begin, end = doc.spans[i]
+        parts.append(doc.text[cursor:begin])
+        word = doc.text[begin:end]
+        parts.append(HIGHLIGHT_START + word + HIGHLIGHT_END if i in marked else word)
+        cursor = end
+    if hi < len(doc.words):
+        parts.append('…')
+    return ''.join(parts)
+
+
+def _python_search(node, hashes, limit):
+    from .models import ResumeText
+
+    results = []
+    for i in range(0, len(hashes), HASH_CHUNK):
+        rows = ResumeText.objects.filter(
+            content_hash__in=hashes[i:i + HASH_CHUNK], extractor_version=EXTRACTOR_VERSION,
+            status=ResumeText.STATUS_DONE,
+        ).values_list('content_hash', 'text')
+        for content_hash, text in rows:
+            doc = _Document(text)
+            hits = []
+            if _evaluate(node, doc, hits) and hits:
+                results.append((len(hits) / (1 + len(doc.words)) ** 0.5, content_hash, _python_snippet(doc, hits)))
+    results.sort(key=lambda row: row[0], reverse=True)
+    return [(content_hash, snippet) for _, content_hash, snippet in results[:limit]]
+
+
+# ==========================
+# FTS5
+# ==========================
+def _fts_search(node, hashes, limit):
+    match = to_fts(node)
+    results = []
+    with connection.cursor() as cursor:
+        for i in range(0, len(hashes), HASH_CHUNK):
+            chunk = hashes[i:i + HASH_CHUNK]
+            cursor.execute(
+                "SELECT bm25(userapp_resumetext_fts), r.content_hash, "
+                "snippet(userapp_resumetext_fts, 0, %s, %s, '…', %s) "
+                "FROM userapp_resumetext_fts JOIN userapp_resumetext r ON r.id = userapp_resumetext_fts.rowid "
+                "WHERE userapp_resumetext_fts MATCH %s AND r.extractor_version = %s AND r.status = 'done' "
+                "AND r.content_hash IN (" + ', '.join(['%s'] * len(chunk)) + ") "
+                "ORDER BY bm25(userapp_resumetext_fts) LIMIT %s",
+                [HIGHLIGHT_START, HIGHLIGHT_END, SNIPPET_TOKENS, match, EXTRACTOR_VERSION] + chunk + [limit],
+            )
+            results.extend(cursor.fetchall())
+    # bm25 uses whole-table statistics, so ranks from different chunks compare
+    results.sort(key=lambda row: row[0])
+    return [(content_hash, snippet) for _, content_hash, snippet in results[:limit]]
+
+
+def search_backend():
+    backend = getattr(settings, 'RESUME_SEARCH_BACKEND', 'auto')
+    if backend == 'auto':
+        backend = 'fts' if fts_available('userapp_resumetext_fts') else 'python'
+    return backend
+
+
+def snippet_parts(snippet):
+    """Split a marked snippet into (text, highlighted) pairs for the template."""
+    parts = []
+    for i, piece in enumerate(re.split('[%s%s]' % (HIGHLIGHT_START, HIGHLIGHT_END), snippet)):
+        if piece:
+            parts.append((piece, i % 2 == 1))
+    return parts
+
+
+def search_resumes(recruiter, query, job=None, limit=50):
+    """Ranked resume hits among the applicants to `recruiter`'s jobs (or just `job`).
+
+    Returns a list of {'applications': [...], 'snippet': [(text, highlighted), ...]}
+    best match first, one entry per distinct resume. Raises QueryError for a
+    query that cannot be run.
+    """
+    from .models import Application
+
+    node = parse_query(query)
+    if node is None:
+        return []
+    # both backends accept exactly the queries FTS5 can run
+    to_fts(node)
+
+    applications = Application.objects.filter(job__recruiter=recruiter, status='applied')
+    if job is not None:
+        applications = applications.filter(job=job)
+    by_hash = OrderedDict()
+    for app in applications.select_related('job', 'user__profile').order_by('-applied_at'):
+        if app.resume:
+            content_hash = app.resume_hash
+        else:
+            profile = getattr(app.user, 'profile', None)
+            content_hash = profile.resume_hash if profile is not None and profile.resume else ''
+        if content_hash:
+            by_hash.setdefault(content_hash, []).append(app)
+    if not by_hash:
+        return []
+
+    hashes = list(by_hash)
+    if search_backend() == 'fts':
+        hits = _fts_search(node, hashes, limit)
+    else:
+        hits = _python_search(node, hashes, limit)
+    return [
+        {'applications': by_hash[content_hash], 'snippet': snippet_parts(snippet)}
+        for content_hash, snippet in hits
+    ]
@@ -0,0 +1,311 @@
+"""Structured trace of ATS scoring decisions.
+
+Scoring calls `record_score_trace` with values it already computed. Sampled
+entries go onto a bounded in-memory queue; a background thread drains it in
+batches and appends them as JSON lines to a size-rotated file, so requests
+never wait on disk I/O. Configured by settings.ATS_TRACE.
+
+Every process runs its own writer on the same file. A writer holds an
+exclusive lock on `<path>.lock` while it checks the size, rotates and
+appends, so rotation and the offset index stay consistent across processes.
+
+Next to the trace file the writer keeps `<path>.index/`, one small file per
+username holding the byte offsets of that user's entries, so `tail_entries`
+can read a user's latest entries without scanning the trace.
+"""
+import atexit
+import contextlib
+import hashlib
+import json
+import os
+import queue
+import random
+import shutil
+import struct
+import threading
+from datetime import datetime
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULTS = {
+    'ENABLED': True,
+    'PATH': 'ats_trace.jsonl',
+    'SAMPLE_RATE': 0.01,
+    'MAX_BYTES': 5 * 1024 * 1024,
+    'BACKUP_COUNT': 3,
+    'QUEUE_SIZE': 10000,
+    'BATCH_SIZE': 500,
+}
+
+_STOP = object()
+_OFFSET = struct.Struct('<Q')
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def trace_settings():
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, 'ATS_TRACE', {}))
+    conf['PATH'] = str(conf['PATH'])
+    return conf
+
+
+class TraceWriter(threading.Thread):
+    """Background thread that appends queued entries to the trace file."""
+
+    def __init__(self, path, max_bytes, backup_count, queue_size, batch_size):
+        super().__init__(name='ats-trace-writer', daemon=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def submit(self, entry):
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            # never block a request on tracing; count what was lost instead
+            self.dropped += 1
+
+    def run(self):
+        while True:
+            entry = self.queue.get()
+            batch = []
+            stop = entry is _STOP
+            if not stop:
+                batch.append(entry)
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    entry = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stop = True
+                else:
+                    batch.append(entry)
+            if batch:
+                try:
+                    self.write(batch)
+                except Exception:
+                    pass
+            if stop:
+                return
+
+    def write(self, batch):
+        lines = [(json.dumps(entry, default=str) + '\n').encode('utf-8') for entry in batch]
+        with _file_lock(self.path + '.lock'):
+            self._append(batch, lines)
+
+    def _append(self, batch, lines):
+        size = sum(len(line) for line in lines)
+        exists = os.path.exists(self.path)
+        if exists and self.max_bytes and os.path.getsize(self.path) + size > self.max_bytes:
+            self.rotate()
+            exists = False
+        index_dir = _index_dir(self.path)
+        if not exists:
+            # a fresh trace file gets a fresh (and therefore complete) index
+            shutil.rmtree(index_dir, ignore_errors=True)
+            os.makedirs(index_dir, exist_ok=True)
+
+        offsets = {}
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            for entry, line in zip(batch, lines):
+                offsets.setdefault(entry.get('user'), []).append(offset)
+                offset += len(line)
+            f.write(b''.join(lines))
+
+        # traces started before the index existed have no index dir; leave them unindexed
+        if os.path.isdir(index_dir):
+            for user, user_offsets in offsets.items():
+                with open(_index_file(self.path, user), 'ab') as f:
+                    f.write(b''.join(_OFFSET.pack(o) for o in user_offsets))
+
+    def rotate(self):
+        """Shift path -> path.1 -> path.2 ..., keeping `backup_count` old files."""
+        shutil.rmtree(_index_dir(self.path), ignore_errors=True)
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def stop(self, timeout=5):
+        self.queue.put(_STOP)
+        self.join(timeout)
+
+
+def get_writer():
+    """Return the process-wide trace writer, starting it on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                conf = trace_settings()
+                writer = TraceWriter(
+                    conf['PATH'], conf['MAX_BYTES'], conf['BACKUP_COUNT'],
+                    conf['QUEUE_SIZE'], conf['BATCH_SIZE'],
+                )
+                writer.start()
+                atexit.register(writer.stop)
+                _writer = writer
+    return _writer
+
+
+def flush_trace(timeout=5):
+    """Write out everything queued so far and stop the writer (tests, shutdown)."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop(timeout)
+
+
+def record_score_trace(profile, job, result, matched_profile, job_skills_count, conf=None):
+    """Queue one scoring trace entry built from already computed values.
+
+    Callers tracing many pairs pass `conf` (trace_settings()) read once.
+    """
+    conf = conf or trace_settings()
+    if not conf['ENABLED'] or random.random() >= conf['SAMPLE_RATE']:
+        return
+    user = getattr(profile, 'user', None) if profile else None
+    get_writer().submit({
+        'ts': datetime.utcnow().isoformat(),
+        'user': getattr(user, 'username', None) or 'anonymous',
+        'job_id': getattr(job, 'id', None),
+        'title': getattr(job, 'title', ''),
+        'resume_path': result['resume_path'],
+        'resume_len': result['resume_text_len'],
+        'used_resume': result['used_resume'],
+        'matched_resume': result['matched_resume'],
+        'matched_profile': matched_profile,
+        'job_skills_count': job_skills_count,
+        'skill_score': round(result['skill_score'], 2),
+        'edu_score': round(result['edu_score'], 2),
+        'exp_score': round(result['exp_score'], 2),
+        'cert_score': round(result['cert_score'], 2),
+        'total_score': result['score'],
+    })
+
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """Exclusive lock on `path` shared by every process (created if missing)."""
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _index_dir(path):
+    return path + '.index'
+
+
+def _index_file(path, user):
+    # hashed so any username is a safe file name
+    key = hashlib.sha1(str(user).encode('utf-8')).hexdigest()[:20]
+    return os.path.join(_index_dir(path), key)
+
+
+def iter_lines_reversed(path, block_size=64 * 1024):
+    """Yield the non-empty lines of `path` (as bytes) from the end of the file backwards.
+
+    Reads `block_size` bytes at a time, so stopping early only costs the
+    blocks actually read.
+    """
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        tail = b''
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + tail).split(b'\n')
+            # the first piece may continue in the previous block
+            tail = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if tail:
+            yield tail
+
+
+def _parse(line, user=None):
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(entry, dict) or (user and entry.get('user') != user):
+        return None
+    return entry
+
+
+def _indexed_entries(path, user, limit):
+    """Latest entries of `user` via the offset index, or None when there is no usable index."""
+    if not os.path.isdir(_index_dir(path)):
+        return None
+    try:
+        index = open(_index_file(path, user), 'rb')
+    except FileNotFoundError:
+        return []
+    with index:
+        size = index.seek(0, os.SEEK_END)
+        count = min(size // _OFFSET.size, limit)
+        index.seek(size - size % _OFFSET.size - count * _OFFSET.size)
+        raw = index.read(count * _OFFSET.size)
+    offsets = [o for (o,) in _OFFSET.iter_unpack(raw)]
+
+    entries = []
+    with open(path, 'rb') as f:
+        for offset in reversed(offsets):
+            f.seek(offset)
+            # the file may have been rotated since the index was read; skip what no longer matches
+            entry = _parse(f.readline(), user)
+            if entry is not None:
+                entries.append(entry)
+    return entries
+
+
+def tail_entries(path, limit=200, user=None, block_size=64 * 1024):
+    """Return up to `limit` of the newest trace entries (newest first), optionally for one user."""
+    if not os.path.exists(path):
+        return []
+    if user:
+        entries = _indexed_entries(path, user, limit)
+        if entries is not None:
+            return entries
+
+    needle = json.dumps(user).encode('utf-8') if user else None
+    entries = []
+    for line in iter_lines_reversed(path, block_size):
+        if needle and needle not in line:
+            continue
+        entry = _parse(line, user)
+        if entry is not None:
+            entries.append(entry)
+            if len(entries) >= limit:
+                break
+    return entries
@@ -0,0 +1,187 @@
+"""Full-text job search over title, description and required skills.
+
+On SQLite the userapp_job_fts FTS5 table (migration 0017, kept current by
+triggers, see userapp.fts) answers queries and ranks them with bm25. On other
+databases, while its triggers are missing, or with JOB_SEARCH_BACKEND =
+'memory', an in-process inverted index built from the Job table does the same. It is rebuilt after any job is saved or deleted
+in any process, following the job index version kept in the database.
+
+Every query word matches as a prefix ("pyth" finds "python") and all words
+must match. A hit in the title counts most, then skills, then description.
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+
+from .fts import fts_ready
+from .recommendations import job_index_version
+
+# bm25 weights of the indexed columns: title, description, required_skills
+FIELD_WEIGHTS = (10.0, 1.0, 5.0)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# the same words FTS5's unicode61 tokenizer sees: letters and digits, case and accents folded
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+_memory_index = None
+_memory_lock = threading.Lock()
+
+
+def fold(text):
+    """Lowercase and strip accents, as unicode61 does."""
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(fold(text))
+
+
+def fts_available(table):
+    """True when FTS5 table `table` and its three sync triggers exist on this SQLite database.
+
+    Checked on every search (one sqlite_master lookup), so a migration that
+    drops the triggers sends searches to the fallback backend right away.
+    """
+    return fts_ready(connection, table)
+
+
+def _fts_search(terms, cgpa, experience, limit):
+    sql = [
+        "SELECT userapp_job.id FROM userapp_job_fts",
+        "JOIN userapp_job ON userapp_job.id = userapp_job_fts.rowid",
+        "WHERE userapp_job_fts MATCH %s",
+    ]
+    params = [' '.join('"%s"*' % term for term in terms)]
+    if cgpa is not None:
+        sql.append("AND userapp_job.min_cgpa <= %s")
+        params.append(cgpa)
+    if experience is not None:
+        sql.append("AND userapp_job.min_experience <= %s")
+        params.append(experience)
+    sql.append("ORDER BY bm25(userapp_job_fts, %s, %s, %s), userapp_job.id DESC" % FIELD_WEIGHTS)
+    sql.append("LIMIT %s")
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(' '.join(sql), params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+class JobSearchIndex:
+    """In-process inverted index: word -> {job id: field-weighted occurrences}."""
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.postings = {}
+        lengths = {}
+        self.requirements = {}
+        for job_id, title, description, skills, min_cgpa, min_experience in rows:
+            length = 0
+            for weight, text in zip(FIELD_WEIGHTS, (title, description, ' '.join(map(str, skills or [])))):
+                tokens = tokenize(text or '')
+                length += weight * len(tokens)
+                for token in tokens:
+                    docs = self.postings.setdefault(token, {})
+                    docs[job_id] = docs.get(job_id, 0) + weight
+            lengths[job_id] = length
+            self.requirements[job_id] = (min_cgpa or 0, min_experience or 0)
+        # sorted so the words starting with a prefix are one contiguous slice
+        self.words = sorted(self.postings)
+        average = (sum(lengths.values()) / len(lengths)) if lengths else 0
+        # the document-length part of bm25, per job
+        self.norms = {
+            job_id: BM25_K1 * (1 - BM25_B + BM25_B * length / average) if average else BM25_K1
+            for job_id, length in lengths.items()
+        }
+
+    @classmethod
+    def build(cls, version=None):
+        from .models import Job
+        rows = Job.objects.values_list(
+            'id', 'title', 'description', 'required_skills', 'min_cgpa', 'min_experience',
+        ).iterator()
+        return cls(rows, version)
+
+    def _term_scores(self, prefix):
+        """bm25 score of every job containing a word starting with `prefix`."""
+        scores = {}
+        count = len(self.norms)
+        norms = self.norms
+        for i in range(bisect.bisect_left(self.words, prefix), len(self.words)):
+            word = self.words[i]
+            if not word.startswith(prefix):
+                break
+            docs = self.postings[word]
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for job_id, tf in docs.items():
+                scores[job_id] = scores.get(job_id, 0) + idf * tf * (BM25_K1 + 1) / (tf + norms[job_id])
+        return scores
+
+    def search(self, terms, cgpa=None, experience=None, limit=50):
+        scores = None
+        # rarest-looking (longest) prefixes first keep the intersection small
+        for term in sorted(terms, key=len, reverse=True):
+            term_scores = self._term_scores(term)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {job_id: s + term_scores[job_id] for job_id, s in scores.items() if job_id in term_scores}
+            if not scores:
+                return []
+        hits = [
+            (score, job_id) for job_id, score in scores.items()
+            if (cgpa is None or self.requirements[job_id][0] <= cgpa)
+            and (experience is None or self.requirements[job_id][1] <= experience)
+        ]
+        return [job_id for _, job_id in heapq.nlargest(limit, hits)]
+
+
+def get_memory_index():
+    """The process-wide JobSearchIndex, rebuilt when the job index version (a database row) moved."""
+    global _memory_index
+    version = job_index_version()
+    index = _memory_index
+    if index is None or index.version != version:
+        with _memory_lock:
+            if _memory_index is None or _memory_index.version != version:
+                _memory_index = JobSearchIndex.build(version)
+            index = _memory_index
+    return index
+
+
+def search_backend():
+    backend = getattr(settings, 'JOB_SEARCH_BACKEND', 'auto')
+    if backend == 'auto':
+        backend = 'fts' if fts_available('userapp_job_fts') else 'memory'
+    return backend
+
+
+def search_jobs(query, cgpa=None, experience=None, limit=50):
+    """Jobs matching every word of `query` (as prefixes), best match first.
+
+    `cgpa` / `experience` keep only jobs whose minimum requirement is at most
+    that value. A query without words lists the newest jobs passing the filters.
+    """
+    from .models import Job
+    terms = list(dict.fromkeys(tokenize(query or '')))
+    if not terms:
+        jobs = Job.objects.all()
+        if cgpa is not None:
+            jobs = jobs.filter(min_cgpa__lte=cgpa)
+        if experience is not None:
+            jobs = jobs.filter(min_experience__lte=experience)
+        return list(jobs.order_by('-id')[:limit])
+
+    if search_backend() == 'fts':
+        ids = _fts_search(terms, cgpa, experience, limit)
+    else:
+        ids = get_memory_index().search(terms, cgpa, experience, limit)
+    jobs = Job.objects.in_bulk(ids)
+    return [jobs[job_id] for job_id in ids if job_id in jobs]
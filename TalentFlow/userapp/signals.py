@@ -0,0 +1,138 @@
+from django.db import connections
+from django.db.models.signals import post_delete, post_init, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from .fts import restore_fts_indexes
+from .models import Application, AtsScore, Job, Profile, Skill
+from .notifications import notify_applicants
+from .recommendations import invalidate_job_index
+from .utils import forget_resume_text, resume_content_hash
+
+# fields whose changes make a materialized AtsScore stale
+SCORING_FIELDS = {
+    Profile: ('skills', 'certifications', 'cgpa', 'experience', 'resume_hash'),
+    Job: ('required_skills', 'required_certifications', 'min_cgpa', 'min_experience'),
+    Application: ('status', 'resume_hash'),
+}
+
+
+def _resume_hash_in_use(content_hash):
+    return (Profile.objects.filter(resume_hash=content_hash).exists()
+            or Application.objects.filter(resume_hash=content_hash).exists())
+
+
+@receiver(post_init, sender=Profile)
+@receiver(post_init, sender=Application)
+def remember_resume(sender, instance, **kwargs):
+    """Record the resume as loaded so a replacement can be detected on save."""
+    instance._loaded_resume_name = instance.resume.name if instance.resume else ''
+    instance._loaded_resume_hash = instance.resume_hash
+
+
+@receiver(pre_save, sender=Profile)
+@receiver(pre_save, sender=Application)
+def refresh_resume_hash(sender, instance, **kwargs):
+    """Re-hash the resume whenever the file is replaced, cleared or never hashed."""
+    resume = instance.resume
+    name = resume.name if resume else ''
+    replaced = (
+        name != instance._loaded_resume_name
+        or not getattr(resume, '_committed', True)
+    )
+    if not resume:
+        instance.resume_hash = ''
+    elif replaced or not instance.resume_hash:
+        instance.resume_hash = resume_content_hash(resume)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=Application)
+def invalidate_replaced_resume(sender, instance, **kwargs):
+    """Drop cached text for a resume that is no longer referenced anywhere."""
+    old_hash = instance._loaded_resume_hash
+    if old_hash and old_hash != instance.resume_hash and not _resume_hash_in_use(old_hash):
+        forget_resume_text(old_hash)
+    remember_resume(sender, instance)
+
+
+@receiver(post_delete, sender=Profile)
+@receiver(post_delete, sender=Application)
+def invalidate_deleted_resume(sender, instance, **kwargs):
+    if instance.resume_hash and not _resume_hash_in_use(instance.resume_hash):
+        forget_resume_text(instance.resume_hash)
+
+
+@receiver(pre_save, sender=Profile)
+@receiver(pre_save, sender=Job)
+@receiver(pre_save, sender=Application)
+def detect_scoring_changes(sender, instance, update_fields=None, **kwargs):
+    """Note which scoring inputs this save changes, comparing with the stored row.
+
+    Runs after refresh_resume_hash. Costs one query per save of an existing
+    row, none when `update_fields` leaves out every scoring field.
+    """
+    fields = SCORING_FIELDS[sender]
+    if update_fields is not None:
+        fields = tuple(name for name in fields if name in update_fields)
+    if instance._state.adding or not fields:
+        instance._changed_scoring_fields = ()
+        return
+    stored = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+    if stored is None:
+        instance._changed_scoring_fields = fields
+    else:
+        instance._changed_scoring_fields = tuple(
+            name for name, value in zip(fields, stored) if getattr(instance, name) != value
+        )
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=Job)
+@receiver(post_save, sender=Application)
+def invalidate_stale_scores(sender, instance, created, **kwargs):
+    """Delete materialized scores whose inputs just changed; they are recomputed on next read."""
+    if not created and getattr(instance, '_changed_scoring_fields', ()):
+        if sender is Profile:
+            AtsScore.objects.filter(user_id=instance.user_id).delete()
+        elif sender is Job:
+            AtsScore.objects.filter(job_id=instance.pk).delete()
+        else:
+            AtsScore.objects.filter(user_id=instance.user_id, job_id=instance.job_id).delete()
+    elif created and sender is Application:
+        AtsScore.objects.filter(user_id=instance.user_id, job_id=instance.job_id).delete()
+
+
+@receiver(post_delete, sender=Application)
+def invalidate_withdrawn_scores(sender, instance, **kwargs):
+    AtsScore.objects.filter(user_id=instance.user_id, job_id=instance.job_id).delete()
+
+
+@receiver(post_save, sender=Job)
+def notify_applicants_of_new_requirements(sender, instance, created, **kwargs):
+    """Tell active applicants when an edit changes what the job asks for (and so their scores)."""
+    if not created and getattr(instance, '_changed_scoring_fields', ()):
+        notify_applicants(instance, f"The requirements of '{instance.title}', a job you applied to, have changed.")
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def rebuild_job_index(sender, instance, **kwargs):
+    """The recommendation index holds every job; any change means a rebuild."""
+    invalidate_job_index()
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=Job)
+def sync_skill_set(sender, instance, created, **kwargs):
+    """Keep the Skill links in step with the JSON skills column."""
+    field = 'skills' if sender is Profile else 'required_skills'
+    if created or field in getattr(instance, '_changed_scoring_fields', ()):
+        names = instance.get_skills() if sender is Profile else instance.get_required_skills()
+        instance.skill_set.set(Skill.for_names(names))
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using='default', **kwargs):
+    """Put back FTS triggers dropped by a migration that rebuilt userapp_job or userapp_resumetext."""
+    if sender.name == 'userapp':
+        restore_fts_indexes(connections[using])
@@ -0,0 +1,201 @@
+"""Canonical skill vocabulary.
+
+Skill names typed by students and recruiters are mapped to one canonical
+name each ("JS", "js" and "JavaScript" all become "javascript"), and every
+canonical name has a small integer id. A set of skills is stored as an int
+bitset with bit `id` set for each skill (`skill_mask`), so matching two sets
+is an AND and a popcount. The alias table is built once at import into read-only maps.
+Skills missing from the table are their own canonical name; their id is
+derived from their row in the Skill table (created on first sight), so it is
+the same in every process. Recently used ones are cached in a bounded map.
+"""
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+# canonical name -> other spellings that mean the same skill
+SKILL_ALIASES = {
+    'javascript': ('js', 'ecmascript'),
+    'node.js': ('nodejs',),
+    'react': ('reactjs', 'react.js'),
+    'angular': ('angularjs', 'angular.js'),
+    'vue.js': ('vue', 'vuejs'),
+    'python': ('python3',),
+    'c++': ('cpp',),
+    'c#': ('csharp', 'c sharp'),
+    '.net': ('dotnet', 'dot net'),
+    'go': ('golang',),
+    'postgresql': ('postgres', 'psql'),
+    'mongodb': ('mongo',),
+    'sql server': ('mssql', 'ms sql'),
+    'html': ('html5',),
+    'css': ('css3',),
+    'aws': ('amazon web services',),
+    'gcp': ('google cloud', 'google cloud platform'),
+    'azure': ('microsoft azure',),
+    'kubernetes': ('k8s',),
+    'machine learning': ('ml',),
+    'artificial intelligence': ('ai',),
+    'natural language processing': ('nlp',),
+    'scikit-learn': ('sklearn', 'scikit learn'),
+    'tensorflow': ('tf',),
+    'ci/cd': ('cicd', 'ci cd'),
+}
+
+
+def normalize_skill_name(name):
+    """Lowercase and collapse whitespace; the spelling-independent form of a name."""
+    return ' '.join(str(name).split()).lower()
+
+
+def _build_vocabulary():
+    names = {}
+    for canonical, aliases in SKILL_ALIASES.items():
+        canonical = normalize_skill_name(canonical)
+        names[canonical] = canonical
+        for alias in aliases:
+            names[normalize_skill_name(alias)] = canonical
+    ids = {name: i for i, name in enumerate(sorted(set(names.values())), 1)}
+    forms = {}
+    for form, canonical in names.items():
+        forms.setdefault(ids[canonical], []).append(form)
+    return (
+        MappingProxyType(names),
+        MappingProxyType(ids),
+        MappingProxyType({sid: tuple(sorted(f)) for sid, f in forms.items()}),
+    )
+
+
+# normalized spelling -> canonical name, canonical name -> id, id -> every spelling
+CANONICAL_NAMES, SKILL_IDS, SKILL_FORMS = _build_vocabulary()
+_SKILL_NAMES = MappingProxyType({sid: name for name, sid in SKILL_IDS.items()})
+
+# skills outside the table: id = len(SKILL_IDS) + Skill primary key, most recently used last
+EXTRA_SKILL_CACHE_SIZE = 10000
+_extra_ids = OrderedDict()
+_extra_names = OrderedDict()
+_extra_lock = threading.Lock()
+
+
+def canonical_skill_name(name):
+    normalized = normalize_skill_name(name)
+    return CANONICAL_NAMES.get(normalized, normalized)
+
+
+def _remember(name, sid):
+    with _extra_lock:
+        _extra_ids[name] = sid
+        _extra_names[sid] = name
+        _extra_ids.move_to_end(name)
+        _extra_names.move_to_end(sid)
+        while len(_extra_ids) > EXTRA_SKILL_CACHE_SIZE:
+            _extra_names.pop(_extra_ids.popitem(last=False)[1], None)
+        while len(_extra_names) > EXTRA_SKILL_CACHE_SIZE:
+            _extra_names.popitem(last=False)
+
+
+def clear_skill_cache():
+    """Forget cached ids of skills outside the table (they are looked up again on use)."""
+    with _extra_lock:
+        _extra_ids.clear()
+        _extra_names.clear()
+
+
+def remember_skill_rows(rows):
+    """Cache the ids of Skill rows just read or created."""
+    for row in rows:
+        if row.name not in SKILL_IDS:
+            _remember(row.name, len(SKILL_IDS) + row.pk)
+
+
+def _extra_skill_ids(canonicals):
+    """{name: id} for canonical names outside the table, creating Skill rows for new ones."""
+    from .models import Skill
+
+    ids = {}
+    for name in canonicals:
+        sid = _extra_ids.get(name)
+        if sid is not None:
+            ids[name] = sid
+    missing = [name for name in canonicals if name not in ids]
+    if missing:
+        for row in Skill.for_names(missing):
+            ids[row.name] = len(SKILL_IDS) + row.pk
+    return ids
+
+
+def _canonical_key(name):
+    # Skill.name holds 100 characters
+    return canonical_skill_name(name)[:100] if name else ''
+
+
+def skill_id(name):
+    """Integer id of the canonical skill `name` stands for, or None for a blank name."""
+    canonical = _canonical_key(name)
+    if not canonical:
+        return None
+    return SKILL_IDS.get(canonical) or _extra_skill_ids([canonical]).get(canonical)
+
+
+def skill_ids(names):
+    """Map each distinct skill in `names` to its id, keeping the first spelling seen.
+
+    Returns an ordered {id: stripped original name}; duplicates and aliases
+    of a skill already listed are dropped. Skills outside the table not seen
+    recently are looked up (or created) in the Skill table with one query.
+    """
+    names = [(name, _canonical_key(name)) for name in names]
+    extra = _extra_skill_ids(list(dict.fromkeys(
+        canonical for _, canonical in names if canonical and canonical not in SKILL_IDS
+    )))
+    ids = {}
+    for name, canonical in names:
+        sid = (SKILL_IDS.get(canonical) or extra.get(canonical)) if canonical else None
+        if sid is not None and sid not in ids:
+            ids[sid] = str(name).strip()
+    return ids
+
+
+def skill_name(sid):
+    """Canonical name of a skill id."""
+    name = _SKILL_NAMES.get(sid) or _extra_names.get(sid)
+    if name is None:
+        from .models import Skill
+        name = Skill.objects.values_list('name', flat=True).get(pk=sid - len(SKILL_IDS))
+        _remember(name, sid)
+    return name
+
+
+def skill_forms(sid):
+    """Every spelling of a skill that counts as a mention of it in resume text.
+
+    Spellings of two characters or fewer ("ai", "tf", "go") are left out:
+    in prose they are ordinary words or parts of other terms ("go to",
+    "TF-IDF"). They still name the skill in profiles and job requirements.
+    """
+    return tuple(form for form in SKILL_FORMS.get(sid) or (skill_name(sid),) if len(form) > 2)
+
+
+def skill_mask(ids):
+    """Bitset of skill ids: bit `sid` is set for every id in `ids`."""
+    mask = 0
+    for sid in ids:
+        mask |= 1 << sid
+    return mask
+
+
+def mask_skill_ids(mask):
+    """The skill ids set in `mask`, ascending."""
+    ids = []
+    while mask:
+        low = mask & -mask
+        ids.append(low.bit_length() - 1)
+        mask ^= low
+    return ids
+
+
+def popcount(mask):
+    """Number of skills in a bitset."""
+    # int.bit_count() only exists from Python 3.10
+    return bin(mask).count('1')
+
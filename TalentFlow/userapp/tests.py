@@ -1,3 +1,1200 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.core.management.sql import emit_post_migrate_signal
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .batch_scoring import score_matrix
+from .models import (
+    Application, ArchivedNotification, AtsScore, Job, Notification, OutgoingEmail, Profile, ResumeText, Skill,
+)
+from .notifications import notify_users, prune_read_notifications, send_job_alerts, unread_count
+from .outbox import send_queued_email
+from .recommendations import get_job_index, recommend_jobs
+from .resume_search import QueryError, search_backend as resume_search_backend, search_resumes
+from .scoring_trace import TraceWriter, flush_trace, tail_entries, trace_settings
+from .search import search_backend as job_search_backend, search_jobs
+from . import skills
+from .skills import mask_skill_ids, popcount, skill_id, skill_ids, skill_mask, skill_name
+from .utils import (
+    _RESUME_TEXT_MEMO, ScoringProfile, SkillMatcher, _analyse_in_queue_worker, _resume_analysis_for, analyse_resume,
+    enqueue_resume_extraction, _claim_resume_row, _extract_resume_text, invalidate_scores_for_resume,
+    _ocr_pdf_pages, calculate_ats_score, ensure_ats_scores, fill_ats_scores, get_resume_analysis, get_skill_match,
+    process_resume_queue, rank_applicants, score_profile_against_jobs, top_candidates_for_job,
+)
+
+# every test that scores writes trace entries; keep them out of BASE_DIR
+TRACE_DIR = tempfile.mkdtemp()
+_trace_override = override_settings(ATS_TRACE={'PATH': os.path.join(TRACE_DIR, 'ats_trace.jsonl')})
+
+
+def setUpModule():
+    flush_trace()
+    _trace_override.enable()
+
+
+def tearDownModule():
+    flush_trace()
+    _trace_override.disable()
+    shutil.rmtree(TRACE_DIR, ignore_errors=True)
+
+
+class TempMediaRootMixin:
+    """Point MEDIA_ROOT at a temporary directory for the class and remove it afterwards."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls._media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls._media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+
+RESUME_TEXT = (
+    "Experience building python and django services.\n"
+    "Education: bachelor degree in computer science.\n"
+) * 5
+
+
+@override_settings(RESUME_EXTRACTION_EAGER=True)
+class StudentJobListingQueryTests(TempMediaRootMixin, TestCase):
+    """Student job listings must not issue queries per job."""
+
+    def setUp(self):
+        self.student = User.objects.create_user('student', password='pw')
+        Profile.objects.create(user=self.student, skills=['python'])
+        self.recruiter = User.objects.create_user('recruiter', password='pw')
+        Profile.objects.create(user=self.recruiter, user_type='recruiter')
+        self.client.force_login(self.student)
+
+    def add_jobs(self, count, apply=False):
+        for i in range(count):
+            job = Job.objects.create(
+                recruiter=self.recruiter,
+                title=f"Job {Job.objects.count()}",
+                description='Backend role',
+                required_skills=['python', 'django'],
+            )
+            if apply:
+                Application.objects.create(
+                    user=self.student,
+                    job=job,
+                    resume=SimpleUploadedFile('resume.txt', RESUME_TEXT.encode()),
+                )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assert_constant_queries(self, url_name):
+        self.add_jobs(2, apply=True)
+        self.add_jobs(2)
+        url = reverse(url_name)
+        self.count_queries(url)  # warm resume extraction and session
+        baseline = self.count_queries(url)
+
+        self.add_jobs(20)
+        self.add_jobs(5, apply=True)
+        self.count_queries(url)
+        self.assertEqual(self.count_queries(url), baseline)
+
+    def test_student_dashboard(self):
+        self.assert_constant_queries('student_dashboard')
+
+    def test_job_list(self):
+        self.assert_constant_queries('view_jobs')
+
+    def test_already_applied_flag(self):
+        self.add_jobs(1, apply=True)
+        self.add_jobs(1)
+        response = self.client.get(reverse('student_dashboard'))
+        flags = [item['already_applied'] for item in response.context['jobs_with_score']]
+        self.assertEqual(sorted(flags), [False, True])
+
+
+@override_settings(RESUME_EXTRACTION_EAGER=True)
+class AtsScoreTests(TempMediaRootMixin, TestCase):
+
+    def setUp(self):
+        self.student = User.objects.create_user('student', password='pw')
+        self.profile = Profile.objects.create(user=self.student, skills=['python'], cgpa=7)
+
+    def test_batch_matches_one_job_at_a_time(self):
+        self.profile.resume = SimpleUploadedFile('cv.txt', RESUME_TEXT.encode())
+        self.profile.certifications = ['AWS']
+        self.profile.save()
+        jobs = [
+            Job.objects.create(title='Web', description='d', required_skills=['python', 'django', 'spark'], min_cgpa=7),
+            Job.objects.create(title='Ops', description='d', required_skills=['python3', 'go'], required_certifications=['AWS', 'CKA']),
+            Job.objects.create(title='Java', description='d', required_skills=['java'], min_experience=2),
+            Job.objects.create(title='Any', description='d'),
+        ]
+        application = Application.objects.create(
+            user=self.student, job=jobs[2], resume=SimpleUploadedFile('other.txt', b'Java developer'),
+        )
+        resume_files = {jobs[2].pk: application.resume}
+        with mock.patch('userapp.utils._resume_analysis_for', wraps=_resume_analysis_for) as analysis:
+            results = score_profile_against_jobs(self.profile, jobs, resume_files)
+        # one lookup per distinct resume, not per job
+        self.assertEqual(analysis.call_count, 2)
+        self.assertEqual(results[jobs[0].pk]['score'], round(2 / 3 * 40 + 30, 2))
+        self.assertEqual(results[jobs[0].pk]['matched'], ['python', 'django'])
+        for job in jobs:
+            single = {job.pk: resume_files[job.pk]} if job.pk in resume_files else None
+            self.assertEqual(results[job.pk], score_profile_against_jobs(self.profile, [job], single)[job.pk])
+
+    def test_resume_invalidation_is_two_deletes(self):
+        other = User.objects.create_user('other', password='pw')
+        Profile.objects.create(user=other)
+        jobs = [Job.objects.create(title=f"Job {i}", description='d') for i in range(30)]
+        for job in jobs:
+            Application.objects.create(user=other, job=job)
+        Application.objects.filter(user=other, job__in=jobs[:20]).update(resume_hash='shared')
+        Profile.objects.filter(user=self.student).update(resume_hash='shared')
+        AtsScore.objects.bulk_create([AtsScore(user=u, job=job) for u in (self.student, other) for job in jobs])
+
+        with self.assertNumQueries(2):
+            invalidate_scores_for_resume('shared')
+        self.assertFalse(AtsScore.objects.filter(user=self.student).exists())
+        self.assertEqual(
+            set(AtsScore.objects.values_list('job_id', flat=True)), {job.pk for job in jobs[20:]},
+        )
+
+    def test_edits_drop_stale_scores(self):
+        python = Job.objects.create(title='Py', description='d', required_skills=['python', 'django'])
+        java = Job.objects.create(title='Java', description='d', required_skills=['java'])
+        stored = lambda: set(AtsScore.objects.filter(user=self.student).values_list('job_id', flat=True))
+        ensure_ats_scores(self.student, [python, java])
+        self.assertEqual(stored(), {python.pk, java.pk})
+
+        profile = Profile.objects.get(pk=self.profile.pk)
+        profile.bio = 'Hello'
+        profile.save()
+        self.assertEqual(stored(), {python.pk, java.pk})
+        # in-place edits of the JSON list count too
+        profile.skills.append('django')
+        profile.save()
+        self.assertEqual(stored(), set())
+        self.assertEqual(ensure_ats_scores(profile.user, [python])[python.pk].score, 40)
+        self.assertEqual(sorted(skill.name for skill in profile.skill_set.all()), ['django', 'python'])
+
+        ensure_ats_scores(self.student, [java])
+        java.required_skills = ['java', 'spring']
+        java.save()
+        self.assertEqual(stored(), {python.pk})
+        python.title = 'Python'
+        with self.assertNumQueries(2):  # the UPDATE and the job index version, no lookup
+            python.save(update_fields=['title'])
+        self.assertEqual(stored(), {python.pk})
+
+    def test_order_by_score_reads_stored_scores(self):
+        rng = random.Random(6)
+        for i in range(30):
+            Job.objects.create(
+                title=f'Job {i}', description='d', min_cgpa=rng.choice([0, 6, 9]),
+                required_skills=rng.sample(['python', 'django', 'sql', 'go'], rng.randint(1, 3)),
+            )
+        applied = Job.objects.create(title='Applied', description='d', required_skills=['django'])
+        Application.objects.create(
+            user=self.student, job=applied, resume=SimpleUploadedFile('cv.txt', RESUME_TEXT.encode()),
+        )
+        expected = ensure_ats_scores(self.student, Job.objects.all())
+        expected = sorted(((row.score, job_id) for job_id, row in expected.items()), reverse=True)
+        AtsScore.objects.all().delete()
+        out = StringIO()
+        call_command('fill_ats_scores', stdout=out)
+        self.assertIn('1 student', out.getvalue())
+        # the applied job is scored against the application's resume, as in the listing
+        self.assertEqual(
+            AtsScore.objects.get(user=self.student, job=applied).score,
+            {job_id: score for score, job_id in expected}[applied.pk],
+        )
+        self.assertEqual(fill_ats_scores(), 0)
+
+        self.client.force_login(self.student)
+        url = reverse('student_dashboard')
+        scored = lambda response: [(item['score'], item['job'].pk) for item in response.context['jobs_with_score']]
+        with mock.patch('userapp.utils.score_profile_against_jobs', side_effect=AssertionError('scored in the request')):
+            response = self.client.get(url, {'order': 'score', 'page_size': 8})
+            self.assertEqual(scored(response), expected[:8])
+            cursor = response.context['page'].next_cursor
+            response = self.client.get(url, {'order': 'score', 'page_size': 8, 'cursor': cursor})
+            self.assertEqual(scored(response), expected[8:16])
+
+            response = self.client.get(url, {'min_score': expected[4][0], 'page_size': 50})
+            self.assertEqual(
+                [item['job'].pk for item in response.context['jobs_with_score']],
+                sorted((job_id for score, job_id in expected if score >= expected[4][0]), reverse=True),
+            )
+
+            # a new job is listed by score once the command stored its score
+            new = Job.objects.create(title='New', description='d', required_skills=['python'])
+            response = self.client.get(url, {'order': 'score', 'page_size': 50})
+            self.assertNotIn(new.pk, [job_id for _, job_id in scored(response)])
+        fill_ats_scores()
+        response = self.client.get(url, {'order': 'score', 'page_size': 50})
+        self.assertIn(new.pk, [job_id for _, job_id in scored(response)])
+
+
+@override_settings(RESUME_EXTRACTION_EAGER=True)
+class ResumeTextCacheTests(TempMediaRootMixin, TestCase):
+
+    def setUp(self):
+        _RESUME_TEXT_MEMO.clear()
+
+    def student(self, name, filename, content):
+        user = User.objects.create_user(name, password='pw')
+        return Profile.objects.create(user=user, resume=SimpleUploadedFile(filename, content.encode()))
+
+    def test_same_content_is_extracted_once(self):
+        first = self.student('first', 'cv.txt', RESUME_TEXT)
+        second = self.student('second', 'resume.txt', RESUME_TEXT)
+        self.assertEqual(first.resume_hash, second.resume_hash)
+        with mock.patch('userapp.utils.analyse_resume', wraps=analyse_resume) as analyse:
+            analysis = get_resume_analysis(first.resume)
+            self.assertTrue(analysis['is_resume_like'])
+            with self.assertNumQueries(0):
+                self.assertEqual(get_resume_analysis(second.resume), analysis)
+            _RESUME_TEXT_MEMO.clear()
+            with self.assertNumQueries(1):
+                self.assertEqual(get_resume_analysis(second.resume), analysis)
+        self.assertEqual(analyse.call_count, 1)
+        self.assertEqual(ResumeText.objects.count(), 1)
+
+    def test_text_is_dropped_with_the_last_reference(self):
+        first = self.student('first', 'cv.txt', RESUME_TEXT)
+        second = self.student('second', 'resume.txt', RESUME_TEXT)
+        get_resume_analysis(first.resume)
+        first.delete()
+        self.assertTrue(ResumeText.objects.filter(content_hash=second.resume_hash).exists())
+        old_hash = second.resume_hash
+        second.resume = SimpleUploadedFile('new.txt', b'A different resume')
+        second.save()
+        self.assertFalse(ResumeText.objects.filter(content_hash=old_hash).exists())
+        self.assertNotIn(old_hash, _RESUME_TEXT_MEMO)
+
+
+class ResumeTextCapTests(TempMediaRootMixin, TestCase):
+
+    def test_long_upload_is_cut_at_the_cap(self):
+        path = os.path.join(self.media_root, 'manual.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(RESUME_TEXT * 2000)
+        self.assertEqual(_extract_resume_text(path, max_chars=0), RESUME_TEXT * 2000)
+        with override_settings(RESUME_TEXT_MAX_CHARS=5000):
+            self.assertEqual(_extract_resume_text(path), (RESUME_TEXT * 2000)[:5000])
+
+    def test_pages_past_the_cap_are_never_read(self):
+        read = []
+
+        def pages(path):
+            for n in range(1, 301):
+                read.append(n)
+                yield 'page %03d ' % n
+
+        with mock.patch('userapp.utils.iter_resume_pages', pages):
+            self.assertEqual(_extract_resume_text('manual.pdf', max_chars=45), ''.join('page %03d ' % n for n in range(1, 6)))
+        self.assertEqual(read, [1, 2, 3, 4, 5])
+
+
+@override_settings(RESUME_EXTRACTION_EAGER=False)
+class ResumeQueueTests(TempMediaRootMixin, TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user('student', password='pw')
+        self.profile = Profile.objects.create(user=user, resume=SimpleUploadedFile('cv.txt', RESUME_TEXT.encode()))
+
+    def test_enqueue_then_process(self):
+        row = enqueue_resume_extraction(self.profile.resume)
+        self.assertEqual(row.status, ResumeText.STATUS_PENDING)
+        self.assertEqual(enqueue_resume_extraction(self.profile.resume).pk, row.pk)
+
+        self.assertEqual(process_resume_queue(), 1)
+        row.refresh_from_db()
+        self.assertEqual(row.status, ResumeText.STATUS_DONE)
+        self.assertEqual(row.attempts, 1)
+        self.assertIn('django services', row.text)
+        self.assertEqual(process_resume_queue(), 0)
+
+    def test_claimed_rows_are_left_to_their_worker(self):
+        enqueue_resume_extraction(self.profile.resume)
+        first, second = ResumeText.objects.get(), ResumeText.objects.get()
+        now = timezone.now()
+        self.assertTrue(_claim_resume_row(first, now))
+        self.assertFalse(_claim_resume_row(second, now))
+        self.assertEqual(process_resume_queue(), 0)
+
+        # the claiming worker died: the row is taken over once the lease ran out
+        ResumeText.objects.update(claimed_at=now - timedelta(hours=1))
+        self.assertEqual(process_resume_queue(), 1)
+        self.assertEqual(ResumeText.objects.get().status, ResumeText.STATUS_DONE)
+
+    @override_settings(RESUME_EXTRACTION_MAX_ATTEMPTS=2)
+    def test_failures_are_retried_then_given_up(self):
+        row = enqueue_resume_extraction(self.profile.resume)
+        # a thread pool lets the patched analyse_resume run
+        with mock.patch('userapp.utils._extraction_pool', lambda workers: ThreadPoolExecutor(workers)), \
+                mock.patch('userapp.utils.analyse_resume', side_effect=RuntimeError('corrupt file')):
+            self.assertEqual(process_resume_queue(), 1)
+            row.refresh_from_db()
+            self.assertEqual((row.status, row.attempts, row.claimed_at), (ResumeText.STATUS_PENDING, 1, None))
+            self.assertEqual(process_resume_queue(), 1)
+            row.refresh_from_db()
+            self.assertEqual((row.status, row.attempts), (ResumeText.STATUS_FAILED, 2))
+            self.assertEqual(process_resume_queue(), 0)
+
+
+class ResumeOcrTests(TempMediaRootMixin, TestCase):
+
+    def scanned_pdf(self):
+        path = os.path.join(self.media_root, 'scan.pdf')
+        with open(path, 'wb') as f:
+            f.write(b'%PDF-1.4 no text layer')
+        return path
+
+    def test_pdf_without_text_falls_back_to_ocr(self):
+        path = self.scanned_pdf()
+        with mock.patch('userapp.utils._ocr_pdf_pages', return_value=iter(['page one', '', 'page three'])):
+            self.assertEqual(_extract_resume_text(path), 'page one page three ')
+        with mock.patch('userapp.utils._ocr_pdf_pages', side_effect=RuntimeError('no tesseract')):
+            self.assertEqual(_extract_resume_text(path), '')
+
+    @override_settings(RESUME_OCR_WORKERS=4, RESUME_OCR_MAX_PAGES=3)
+    def test_pages_are_ocrd_serially_outside_the_queue_worker(self):
+        pages = {1: 'one', 2: RuntimeError('bad page'), 3: 'three'}
+        with mock.patch('userapp.utils._pdf_page_count', return_value=10), \
+                mock.patch('userapp.utils._ocr_page', side_effect=lambda path, n, dpi: _page(pages[n])), \
+                mock.patch('userapp.utils.ProcessPoolExecutor', side_effect=AssertionError('OCR pool')):
+            self.assertEqual(list(_ocr_pdf_pages(self.scanned_pdf())), ['one', 'three'])
+            with override_settings(RESUME_OCR_TIME_BUDGET=0):
+                self.assertEqual(list(_ocr_pdf_pages(self.scanned_pdf())), [])
+
+    @override_settings(RESUME_OCR_WORKERS=4, RESUME_OCR_MAX_PAGES=3)
+    def test_queue_worker_ocrs_one_resume_on_a_pool(self):
+        pages = {1: 'one', 2: RuntimeError('bad page'), 3: 'three'}
+        path = self.scanned_pdf()
+        with mock.patch('userapp.utils._pdf_page_count', return_value=10), \
+                mock.patch('userapp.utils._ocr_page', side_effect=lambda path, n, dpi: _page(pages[n])), \
+                mock.patch('userapp.utils.ProcessPoolExecutor', side_effect=ThreadPoolExecutor) as pool, \
+                mock.patch('userapp.utils.analyse_resume', lambda path: list(_ocr_pdf_pages(path))):
+            self.assertEqual(_analyse_in_queue_worker(path), ['one', 'three'])
+            self.assertEqual(pool.call_count, 1)
+            # back to serial once that resume is done
+            self.assertEqual(list(_ocr_pdf_pages(path)), ['one', 'three'])
+            self.assertEqual(pool.call_count, 1)
+
+
+def _page(value):
+    if isinstance(value, Exception):
+        raise value
+    return value
+
+
+class SkillAliasTests(TempMediaRootMixin, TestCase):
+
+    def test_aliases_and_duplicates_collapse(self):
+        user = User.objects.create_user('student', password='pw')
+        profile = Profile.objects.create(user=user, skills=['JS', 'postgres'])
+        job = Job.objects.create(
+            title='Web', description='d',
+            required_skills=['JavaScript', 'javascript', 'PostgreSQL', 'Docker'],
+        )
+        self.assertEqual(calculate_ats_score(profile, job), round(2 / 3 * 40, 2))
+        self.assertEqual(get_skill_match(profile, job)['matched'], ['JavaScript', 'PostgreSQL'])
+        self.assertEqual(sorted(job.skill_set.values_list('name', flat=True)), ['docker', 'javascript', 'postgresql'])
+
+    def test_skill_bitsets(self):
+        ids = skill_ids(['JS', 'javascript', 'Go', 'some new skill'])
+        mask = skill_mask(ids)
+        self.assertEqual(mask_skill_ids(mask), sorted(ids))
+        self.assertEqual(popcount(mask & skill_mask(skill_ids(['golang', 'ecmascript', 'rust']))), 2)
+
+    def test_unknown_skill_ids_come_from_the_skill_table(self):
+        skills.clear_skill_cache()
+        sid = skill_id('Some New Skill')
+        self.assertEqual(sid, len(skills.SKILL_IDS) + Skill.objects.get(name='some new skill').pk)
+        with mock.patch.object(skills, 'EXTRA_SKILL_CACHE_SIZE', 3):
+            ids = skill_ids(['extra %d' % i for i in range(10)])
+            self.assertEqual(len(skills._extra_ids), 3)
+            self.assertLessEqual(len(skills._extra_names), 3)
+            # evicted ids resolve to the same skill again (as another process would)
+            self.assertEqual(skill_id('Some New Skill'), sid)
+            self.assertEqual(skill_name(next(iter(ids))), 'extra 0')
+
+    @override_settings(RESUME_EXTRACTION_EAGER=True)
+    def test_short_spellings_are_not_resume_mentions(self):
+        job = Job.objects.create(
+            title='ML', description='d', required_skills=['TensorFlow', 'Machine Learning', 'Go', 'AI', 'JavaScript'],
+        )
+        text = RESUME_TEXT + "I go to every TF-IDF talk, took Intro to AI and ML, and wrote JS scripts.\n"
+        profile = Profile.objects.create(
+            user=User.objects.create_user('student', password='pw'), resume=SimpleUploadedFile('cv.txt', text.encode()),
+        )
+        match = get_skill_match(profile, job)
+        self.assertTrue(match['used_resume'])
+        self.assertEqual(match['matched'], [])
+
+        text = RESUME_TEXT + "Built golang services and tensorflow models with machine learning and javascript.\n"
+        profile.resume = SimpleUploadedFile('cv2.txt', text.encode())
+        profile.save()
+        self.assertEqual(get_skill_match(profile, job)['matched'], ['TensorFlow', 'Machine Learning', 'Go', 'JavaScript'])
+        # short spellings still name the skill in profiles and jobs
+        self.assertEqual(list(skill_ids(['tf', 'ml', 'golang'])), list(skill_ids(['tensorflow', 'machine learning', 'go'])))
+
+
+class SkillMatcherTests(TestCase):
+
+    SKILLS = ['c++', 'c', '.net', 'net', 'c#', 'go', 'r', 'node.js', 'ci/cd', 'café', 'é', 'sql server', 'sql']
+
+    def assertMatchesRegex(self, skills, text):
+        expected = {s for s in skills if re.search(r'\b' + re.escape(s) + r'\b', text)}
+        self.assertEqual(SkillMatcher(skills).find(text), expected, text)
+
+    def test_same_matches_as_per_skill_regex(self):
+        for text in [
+            'c++ and c# on .net', 'c++11 / cpp', 'x.net', '(c#)', 'c#c++', 'asp.net core', '.net',
+            'café au lait', 'un café', 'écoles', 'é', 'go-to golang', 'r&d, r', 'node.js,ci/cd',
+            'ms sql server2019', '',
+        ]:
+            self.assertMatchesRegex(self.SKILLS, text)
+
+    def test_random_texts(self):
+        rng = random.Random(17)
+        alphabet = 'abcnetgorsql+#./ é-_\n'
+        for _ in range(300):
+            skills = rng.sample(self.SKILLS, rng.randint(1, len(self.SKILLS)))
+            skills += [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))).strip() or 'x']
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            self.assertMatchesRegex(skills, text)
+
+
+class ScoringProfileTests(TempMediaRootMixin, TestCase):
+
+    def test_snapshot_scores_like_the_profile(self):
+        user = User.objects.create_user('student', password='pw')
+        profile = Profile.objects.create(user=user, skills=['Python', 'SQL'], certifications=['AWS'], cgpa=8, experience=1)
+        job = Job.objects.create(
+            title='Data', description='d', required_skills=['python', 'spark'],
+            required_certifications=['AWS', 'GCP'], min_cgpa=9, min_experience=2,
+        )
+        snapshot = ScoringProfile.from_profile(profile)
+        with self.assertNumQueries(0):
+            self.assertEqual(calculate_ats_score(snapshot, job), calculate_ats_score(profile, job))
+        with self.assertRaises(AttributeError):
+            snapshot.cgpa = 10
+
+    @override_settings(RESUME_EXTRACTION_EAGER=True)
+    def test_snapshot_does_not_read_the_resume(self):
+        user = User.objects.create_user('student', password='pw')
+        profile = Profile.objects.create(user=user, resume=SimpleUploadedFile('cv.txt', RESUME_TEXT.encode()))
+        with self.assertNumQueries(0):
+            ScoringProfile.from_profile(profile)
+        self.assertFalse(ResumeText.objects.exists())
+
+
+@override_settings(RESUME_EXTRACTION_EAGER=True)
+class ScoreMatrixTests(TempMediaRootMixin, TestCase):
+
+    SKILLS = ['Python', 'python3', 'Django', 'JS', 'JavaScript', 'c++', 'C#', 'Go', 'R', 'ml', 'SQL', 'Docker', 'Spark']
+    CERTS = ['AWS', 'PMP', 'CKA']
+
+    def test_matrix_matches_pairwise_scores(self):
+        rng = random.Random(7)
+        jobs = [
+            Job.objects.create(
+                title=f'Job {i}', description='d',
+                required_skills=rng.sample(self.SKILLS, rng.randint(0, 5)),
+                required_certifications=rng.sample(self.CERTS, rng.randint(0, 2)),
+                min_cgpa=rng.choice([0, 6, 7.5, 9]), min_experience=rng.choice([0, 1, 2.5]),
+            )
+            for i in range(15)
+        ]
+        words = RESUME_TEXT.split() + ['javascript', 'golang', 'c++', 'machine learning', 'spark']
+        profiles = []
+        for i in range(12):
+            profile = Profile.objects.create(
+                user=User.objects.create_user(f'student{i}', password='pw'),
+                skills=rng.sample(self.SKILLS, rng.randint(0, 4)),
+                certifications=rng.sample(self.CERTS, rng.randint(0, 3)),
+                cgpa=rng.choice([0, 5, 8.3, 10]), experience=rng.choice([0, 1, 3]),
+            )
+            if i % 3:
+                text = ' '.join(rng.choice(words) for _ in range(60)) if i % 4 else 'just a note'
+                profile.resume = SimpleUploadedFile('cv.txt', text.encode())
+                profile.save()
+            profiles.append(profile)
+
+        scores = score_matrix(profiles, jobs, chunk_size=5)
+        self.assertEqual(scores.shape, (12, 15))
+        for i, profile in enumerate(profiles):
+            for j, job in enumerate(jobs):
+                self.assertEqual(scores[i, j], calculate_ats_score(profile, job))
+
+    def test_command_scores_students_only(self):
+        job = Job.objects.create(title='Py', description='d', required_skills=['python'])
+        Profile.objects.create(user=User.objects.create_user('student', password='pw'), skills=['python'])
+        Profile.objects.create(user=User.objects.create_user('recruiter', password='pw'), user_type='recruiter')
+        out = StringIO()
+        call_command('compute_score_matrix', stdout=out, stderr=StringIO())
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(lines, [{'user': 'student', 'jobs': [{'job_id': job.pk, 'score': 40.0}]}])
+
+
+@override_settings(RESUME_EXTRACTION_EAGER=True)
+class RecommendationTests(TempMediaRootMixin, TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='pw')
+        self.profile = Profile.objects.create(
+            user=self.user, skills=['Python', 'SQL'], certifications=['AWS'], cgpa=8, experience=2,
+        )
+
+    def brute_force(self, k):
+        results = score_profile_against_jobs(self.profile, list(Job.objects.all()))
+        ranked = sorted(results.items(), key=lambda item: (item[1]['score'], item[0]), reverse=True)
+        return [(pk, result['score']) for pk, result in ranked[:k]]
+
+    def test_top_k_matches_scoring_every_job(self):
+        rng = random.Random(3)
+        skills = ['python', 'sql', 'django', 'go', 'spark', 'docker', 'js']
+        for i in range(80):
+            Job.objects.create(
+                title=f'Job {i}', description='d', required_skills=rng.sample(skills, rng.randint(0, 4)),
+                required_certifications=rng.sample(['AWS', 'PMP'], rng.randint(0, 2)),
+                min_cgpa=rng.choice([0, 7, 9]), min_experience=rng.choice([0, 1, 3]),
+            )
+        self.profile.resume = SimpleUploadedFile('cv.txt', (RESUME_TEXT + 'docker spark\n').encode())
+        self.profile.save()
+        for k in (1, 5, 20):
+            recs = recommend_jobs(self.profile, k)
+            self.assertEqual([(rec['job'].pk, rec['score']) for rec in recs], self.brute_force(k))
+
+    def test_stops_before_scoring_every_job(self):
+        for i in range(5):
+            Job.objects.create(title=f'Exact {i}', description='d', required_skills=['python'],
+                               required_certifications=['AWS'], min_cgpa=8, min_experience=2)
+        for i in range(60):
+            Job.objects.create(title=f'Wide {i}', description='d', required_skills=['python', f'skill{i}'])
+            Job.objects.create(title=f'Other {i}', description='d', required_skills=['rust'], min_cgpa=6)
+
+        with mock.patch('userapp.recommendations.score_profile_against_jobs', wraps=score_profile_against_jobs) as scorer:
+            recs = recommend_jobs(self.profile, 3)
+        self.assertEqual([rec['score'] for rec in recs], [100, 100, 100])
+        scored = sum(len(call.args[1]) for call in scorer.call_args_list)
+        self.assertLess(scored, Job.objects.count() // 2)
+
+    def test_index_follows_version_written_elsewhere(self):
+        Job.objects.create(title='Old', description='d', required_skills=['python'])
+        index = get_job_index()
+        self.assertIs(get_job_index(), index)
+
+        # a job and a version bump written by another process: no signals here
+        Job.objects.bulk_create([Job(title='New', description='d', required_skills=['python'])])
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE userapp_indexversion SET version = version + 1 WHERE name = 'jobs'")
+        rebuilt = get_job_index()
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual({job.title for job in rebuilt.jobs.values()}, {'Old', 'New'})
+
+    def test_endpoint(self):
+        job = Job.objects.create(title='Data', description='d', required_skills=['python'])
+        self.client.force_login(self.user)
+        data = self.client.get(reverse('recommended_jobs'), {'k': 5}).json()
+        self.assertEqual(data['k'], 5)
+        self.assertEqual(data['jobs'][0]['id'], job.pk)
+        self.assertEqual(data['jobs'][0]['matched_skills'], ['python'])
+
+
+class JobSearchTests(TestCase):
+
+    def setUp(self):
+        self.backend = Job.objects.create(
+            title='Backend Engineer', description='Build APIs in Django.', required_skills=['Python', 'PostgreSQL'],
+            min_cgpa=7, min_experience=2,
+        )
+        self.data = Job.objects.create(
+            title='Data Analyst', description='Reporting with python notebooks.', required_skills=['SQL'],
+            min_cgpa=6,
+        )
+        self.frontend = Job.objects.create(
+            title='Frontend Developer', description='React interfaces.', required_skills=['JavaScript'],
+        )
+
+    def assert_search(self, query, expected, **filters):
+        self.assertEqual([job.pk for job in search_jobs(query, **filters)], [job.pk for job in expected])
+
+    def check_backend(self):
+        self.assert_search('pyth', [self.backend, self.data])  # prefix; skill beats description
+        self.assert_search('python engineer', [self.backend])
+        self.assert_search('analyst', [self.data])
+        self.assert_search('pyth', [self.data], cgpa=6.5)
+        self.assert_search('pyth', [self.data], experience=1)
+        self.assert_search('golang', [])
+
+        self.frontend.title = 'Python Frontend Developer'
+        self.frontend.save()
+        self.assert_search('python', [self.frontend, self.backend, self.data])
+        self.data.delete()
+        self.assert_search('python', [self.frontend, self.backend])
+
+    def test_fts_backend(self):
+        with self.settings(JOB_SEARCH_BACKEND='fts'):
+            self.check_backend()
+
+    def test_memory_backend(self):
+        with self.settings(JOB_SEARCH_BACKEND='memory'):
+            self.check_backend()
+
+    def test_memory_index_follows_version_written_elsewhere(self):
+        with self.settings(JOB_SEARCH_BACKEND='memory'):
+            self.assert_search('rust', [])
+            # a job and a version bump written by another process: no signals here
+            Job.objects.bulk_create([Job(title='Rust Engineer', description='d')])
+            self.assert_search('rust', [])
+            with connection.cursor() as cursor:
+                cursor.execute("UPDATE userapp_indexversion SET version = version + 1 WHERE name = 'jobs'")
+            self.assertEqual([job.title for job in search_jobs('rust')], ['Rust Engineer'])
+
+    def test_view(self):
+        user = User.objects.create_user('student', password='pw')
+        Profile.objects.create(user=user)
+        self.client.force_login(user)
+        response = self.client.get(reverse('search_jobs'), {'q': 'react', 'cgpa': 'x'})
+        self.assertEqual([job.pk for job in response.context['jobs']], [self.frontend.pk])
+
+
+@override_settings(RESUME_EXTRACTION_EAGER=True)
+class ResumeSearchTests(TempMediaRootMixin, TestCase):
+
+    def setUp(self):
+        self.recruiter = User.objects.create_user('recruiter', password='pw')
+        self.job = Job.objects.create(recruiter=self.recruiter, title='Engineer', description='d')
+        other_job = Job.objects.create(recruiter=User.objects.create_user('other', password='pw'), title='X', description='d')
+        self.ml = self.apply('ml', self.job, 'Python and Django developer, machine learning on AWS.')
+        self.java = self.apply('java', self.job, 'Java Spring Boot engineer on GCP, former intern.')
+        self.elsewhere = self.apply('elsewhere', other_job, 'Python developer.')
+        # no resume on the application: the profile resume is searched
+        self.profile_only = self.apply('profile_only', self.job, 'Python and Kubernetes operator.', on_profile=True)
+
+    def apply(self, username, job, text, on_profile=False):
+        user = User.objects.create_user(username, password='pw')
+        profile = Profile.objects.create(user=user)
+        resume = SimpleUploadedFile('cv.txt', text.encode())
+        if on_profile:
+            profile.resume = resume
+            profile.save()
+            enqueue_resume_extraction(profile.resume)
+            return Application.objects.create(user=user, job=job)
+        app = Application.objects.create(user=user, job=job, resume=resume)
+        enqueue_resume_extraction(app.resume)
+        return app
+
+    def assert_hits(self, query, expected):
+        hits = search_resumes(self.recruiter, query)
+        self.assertEqual({hit['applications'][0].pk for hit in hits}, {app.pk for app in expected})
+        return hits
+
+    def check_backend(self):
+        hits = self.assert_hits('python', [self.ml, self.profile_only])
+        self.assertIn(('Python', True), hits[0]['snippet'])
+        self.assert_hits('"machine learning"', [self.ml])
+        self.assert_hits('"learning machine"', [])
+        self.assert_hits('java OR kubernetes', [self.java, self.profile_only])
+        self.assert_hits('python -django', [self.profile_only])
+        self.assert_hits('(aws OR gcp) AND NOT intern', [self.ml])
+        self.assert_hits('kube*', [self.profile_only])
+        with self.assertRaises(QueryError):
+            search_resumes(self.recruiter, 'NOT java')
+
+        self.java.resume = SimpleUploadedFile('cv2.txt', b'Rust systems programmer.')
+        self.java.save()
+        enqueue_resume_extraction(self.java.resume)
+        self.assert_hits('rust', [self.java])
+        self.assert_hits('spring', [])
+
+    def test_fts_backend(self):
+        with self.settings(RESUME_SEARCH_BACKEND='fts'):
+            self.check_backend()
+
+    def test_python_backend(self):
+        with self.settings(RESUME_SEARCH_BACKEND='python'):
+            self.check_backend()
+
+    def test_view(self):
+        self.client.force_login(self.recruiter)
+        response = self.client.get(reverse('resume_search'), {'q': 'aws', 'job': self.job.pk})
+        self.assertEqual([hit['applications'][0].pk for hit in response.context['hits']], [self.ml.pk])
+        self.assertContains(response, '<mark>AWS</mark>')
+
+
+class SearchTriggerRepairTests(TempMediaRootMixin, TransactionTestCase):
+
+    def rebuild(self, model):
+        # what AddField or RemoveField does to a table on SQLite; its triggers go with it
+        with connection.schema_editor() as editor:
+            editor._remake_table(model)
+
+    def migrate(self):
+        emit_post_migrate_signal(verbosity=0, interactive=False, db='default')
+
+    def test_job_search_after_table_rebuild(self):
+        titles = lambda: sorted(job.title for job in search_jobs('rust'))
+        Job.objects.create(title='Rust Engineer', description='d')
+        self.rebuild(Job)
+        self.assertEqual(job_search_backend(), 'memory')
+        Job.objects.create(title='Rust Intern', description='d')
+        self.assertEqual(titles(), ['Rust Engineer', 'Rust Intern'])
+
+        self.migrate()
+        self.assertEqual(job_search_backend(), 'fts')
+        Job.objects.create(title='Rust Lead', description='d')
+        self.assertEqual(titles(), ['Rust Engineer', 'Rust Intern', 'Rust Lead'])
+
+    @override_settings(RESUME_EXTRACTION_EAGER=True)
+    def test_resume_search_after_table_rebuild(self):
+        recruiter = User.objects.create_user('recruiter', password='pw')
+        job = Job.objects.create(recruiter=recruiter, title='Engineer', description='d')
+
+        def apply(username, text):
+            user = User.objects.create_user(username, password='pw')
+            app = Application.objects.create(user=user, job=job, resume=SimpleUploadedFile('cv.txt', text.encode()))
+            enqueue_resume_extraction(app.resume)
+            return app
+
+        hits = lambda: {hit['applications'][0].pk for hit in search_resumes(recruiter, 'rust')}
+        first = apply('first', 'Rust systems programmer.')
+        self.rebuild(ResumeText)
+        # searches stop using the stale index at once
+        self.assertEqual(resume_search_backend(), 'python')
+        second = apply('second', 'Rust and Go developer.')
+        self.assertEqual(hits(), {first.pk, second.pk})
+
+        self.migrate()
+        self.assertEqual(resume_search_backend(), 'fts')
+        third = apply('third', 'Embedded Rust.')
+        self.assertEqual(hits(), {first.pk, second.pk, third.pk})
+
+
+@override_settings(RESUME_EXTRACTION_EAGER=True)
+class RankApplicantsTests(TempMediaRootMixin, TestCase):
+
+    def test_scores_from_one_bulk_resume_query(self):
+        recruiter = User.objects.create_user('recruiter', password='pw')
+        job = Job.objects.create(
+            recruiter=recruiter, title='Engineer', description='d', required_skills=['python', 'django', 'java'],
+        )
+        # more applicants than the resume memo holds
+        for i in range(140):
+            user = User.objects.create(username='applicant%d' % i)
+            Profile.objects.create(user=user, skills=['python'])
+            text = RESUME_TEXT + ('java' if i % 2 else 'rust') + ' applicant %d\n' % i
+            app = Application.objects.create(user=user, job=job, resume=SimpleUploadedFile('cv.txt', text.encode()))
+            enqueue_resume_extraction(app.resume)
+        AtsScore.objects.all().delete()
+        _RESUME_TEXT_MEMO.clear()
+
+        # applications, stored scores, resume texts and one bulk insert
+        with self.assertNumQueries(4):
+            ranked = rank_applicants(job)
+        self.assertEqual(len(ranked), 140)
+        self.assertEqual(AtsScore.objects.filter(job=job).count(), 140)
+        self.assertEqual(ranked[0][0].user.username, 'applicant1')
+        self.assertEqual(sorted(ranked[0][1].get_matched_skills()), ['django', 'java', 'python'])
+
+        self.client.force_login(recruiter)
+        response = self.client.get(reverse('job_applicants', args=[job.pk]), {'format': 'jsonl'})
+        self.assertTrue(response.streaming)
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([line['rank'] for line in lines], list(range(1, 141)))
+
+    @override_settings(RESUME_EXTRACTION_EAGER=False)
+    def test_unextracted_resumes_are_queued_not_extracted(self):
+        job = Job.objects.create(title='Engineer', description='d', required_skills=['python', 'django'])
+        user = User.objects.create_user('applicant', password='pw')
+        Profile.objects.create(user=user, skills=['python'])
+        Application.objects.create(user=user, job=job, resume=SimpleUploadedFile('cv.txt', RESUME_TEXT.encode()))
+
+        with mock.patch('userapp.utils._extraction_pool', side_effect=AssertionError('process pool in a request')), \
+                mock.patch('userapp.utils.analyse_resume', side_effect=AssertionError('extracted in a request')):
+            [(_, score)] = rank_applicants(job)
+        # scored from the profile skills until the resume is extracted
+        self.assertEqual((score.score, score.used_resume), (20, False))
+        self.assertEqual(ResumeText.objects.get().status, ResumeText.STATUS_PENDING)
+
+        self.assertEqual(process_resume_queue(), 1)
+        [(_, score)] = rank_applicants(job)
+        self.assertEqual((score.score, score.used_resume), (40, True))
+
+
+class TopCandidatesTests(TestCase):
+
+    def student(self, name, skills, cgpa=0, user_type='student'):
+        user = User.objects.create_user(name, password='pw')
+        return Profile.objects.create(user=user, skills=skills, cgpa=cgpa, user_type=user_type)
+
+    def test_ranked_by_shared_skills_in_sql(self):
+        recruiter = User.objects.create_user('recruiter', password='pw')
+        job = Job.objects.create(
+            recruiter=recruiter, title='Web', description='d', required_skills=['JavaScript', 'React', 'Node.js'],
+        )
+        full = self.student('full', ['js', 'reactjs', 'nodejs', 'go'])
+        strong = self.student('strong', ['react', 'ecmascript'], cgpa=9)
+        weak = self.student('weak', ['javascript', 'REACT', 'python'], cgpa=6)
+        self.student('none', ['python'], cgpa=10)
+        self.student('other', ['javascript', 'react', 'node.js'], user_type='recruiter')
+
+        # the job's skill ids, the ranking and the matched skills
+        with self.assertNumQueries(3):
+            candidates = top_candidates_for_job(job, limit=5)
+        self.assertEqual([c.pk for c in candidates], [full.pk, strong.pk, weak.pk])
+        self.assertEqual([c.matched_count for c in candidates], [3, 2, 2])
+        self.assertEqual([s.name for s in candidates[0].matched_skill_list], ['javascript', 'node.js', 'react'])
+        self.assertEqual([c.pk for c in top_candidates_for_job(job, limit=1)], [full.pk])
+
+        self.client.force_login(recruiter)
+        response = self.client.get(reverse('job_top_candidates', args=[job.pk]), {'n': 2})
+        self.assertEqual([c.pk for c in response.context['candidates']], [full.pk, strong.pk])
+        self.assertEqual(response.context['required_count'], 3)
+
+
+class JsonFieldTests(TempMediaRootMixin, TestCase):
+
+    def test_post_job_skips_identical_job(self):
+        recruiter = User.objects.create_user('recruiter', password='pw')
+        Profile.objects.create(user=recruiter, user_type='recruiter')
+        self.client.force_login(recruiter)
+        data = {'title': 'Backend', 'description': 'd', 'skills': 'python, django'}
+        self.client.post(reverse('post_job'), data)
+        self.client.post(reverse('post_job'), data)
+        self.assertEqual(list(Job.objects.values_list('required_skills', flat=True)), [['python', 'django']])
+
+    def test_upload_resume_stores_skill_list(self):
+        student = User.objects.create_user('student', password='pw')
+        Profile.objects.create(user=student)
+        self.client.force_login(student)
+        self.client.post(reverse('upload_resume'), {
+            'skills': 'python, sql',
+            'resume': SimpleUploadedFile('resume.txt', RESUME_TEXT.encode()),
+        })
+        profile = Profile.objects.get(user=student)
+        self.assertEqual(profile.get_skills(), ['python', 'sql'])
+        self.assertEqual(sorted(profile.skill_set.values_list('name', flat=True)), ['python', 'sql'])
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.recruiter = User.objects.create_user('recruiter', password='pw')
+        Profile.objects.create(user=self.recruiter, user_type='recruiter')
+        for i in range(7):
+            Job.objects.create(recruiter=self.recruiter, title=f"Job {i}", description='d')
+        self.client.force_login(self.recruiter)
+
+    def test_cursor_walks_every_job_once(self):
+        seen = []
+        url = reverse('recruiter_jobs') + '?page_size=3'
+        while url:
+            response = self.client.get(url)
+            page = response.context['page']
+            self.assertLessEqual(len(page.items), 3)
+            seen.extend(job.id for job in page.items)
+            url = (reverse('recruiter_jobs') + f"?cursor={page.next_cursor}&page_size=3") if page.has_next else None
+        self.assertEqual(seen, sorted(Job.objects.values_list('id', flat=True), reverse=True))
+
+    def test_bad_cursor_falls_back_to_first_page(self):
+        cursors = ['not-a-cursor'] + [
+            base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+            for values in (["abc", "x"], ["abc"], [None], [[1]])
+        ]
+        for cursor in cursors:
+            response = self.client.get(reverse('recruiter_jobs'), {'cursor': cursor, 'page_size': 2})
+            self.assertEqual(len(response.context['page'].items), 2)
+            self.assertEqual(response.context['page'].cursor, '')
+        # the (created_at, id) cursor of the notifications page
+        response = self.client.get(reverse('notifications'), {'cursor': cursors[1]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page'].cursor, '')
+
+    def test_score_order_reads_one_page_of_stored_scores(self):
+        student = User.objects.create_user('student', password='pw')
+        Profile.objects.create(user=student, skills=['python'])
+        for job in Job.objects.all():
+            AtsScore.objects.create(user=student, job=job, score=job.pk % 3 * 10)
+        expected = list(AtsScore.objects.filter(user=student).order_by('-score', '-job_id').values_list('job_id', flat=True))
+        self.client.force_login(student)
+
+        seen = []
+        params = {'order': 'score', 'page_size': 3}
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                page = self.client.get(reverse('student_dashboard'), params).context['page']
+            listing = [q['sql'] for q in queries if 'FROM "userapp_atsscore"' in q['sql']]
+            self.assertEqual(len(listing), 1)
+            self.assertIn('LIMIT 4', listing[0])
+            seen.extend(score.job_id for score in page.items)
+            if not page.has_next:
+                break
+            params['cursor'] = page.next_cursor
+        self.assertEqual(seen, expected)
+
+
+class ScoringTraceTests(TestCase):
+
+    def setUp(self):
+        flush_trace()  # a writer started by an earlier test still points at the module trace path
+        trace_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, trace_dir, True)
+        self.trace_path = os.path.join(trace_dir, 'trace.jsonl')
+        override = override_settings(ATS_TRACE={'PATH': self.trace_path, 'MAX_BYTES': 0, 'SAMPLE_RATE': 1.0})
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(flush_trace)
+        self.job = Job.objects.create(title='Backend', description='d', required_skills=['python'])
+        for name in ('alice', 'bob'):
+            user = User.objects.create_user(name, password='pw')
+            calculate_ats_score(Profile.objects.create(user=user, skills=['python']), self.job)
+        flush_trace()
+
+    def test_entries_are_json_lines(self):
+        with open(self.trace_path, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual([e['user'] for e in entries], ['alice', 'bob'])
+        self.assertEqual(entries[0]['job_id'], self.job.id)
+        self.assertEqual(entries[0]['total_score'], 40)
+
+    def test_settings_are_read_once_per_batch(self):
+        jobs = [self.job] + [Job.objects.create(title=f'Job {i}', description='d') for i in range(3)]
+        profile = Profile.objects.get(user__username='alice')
+        with mock.patch('userapp.utils.trace_settings', wraps=trace_settings) as read:
+            score_profile_against_jobs(profile, jobs)
+        self.assertEqual(read.call_count, 1)
+        flush_trace()
+        self.assertEqual(len(tail_entries(self.trace_path, 100, 'alice')), 5)
+
+    def test_admin_view_filters_by_user(self):
+        staff = User.objects.create_user('admin', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('ats_debug') + '?user=bob')
+        self.assertEqual([e['user'] for e in response.context['entries']], ['bob'])
+
+    def test_tail_reader_matches_index(self):
+        for _ in range(30):
+            calculate_ats_score(Profile.objects.get(user__username='alice'), self.job)
+        flush_trace()
+        indexed = tail_entries(self.trace_path, 10, 'alice')
+        shutil.rmtree(self.trace_path + '.index')
+        scanned = tail_entries(self.trace_path, 10, 'alice', block_size=97)
+        self.assertEqual(len(indexed), 10)
+        self.assertEqual(indexed, scanned)
+        self.assertEqual([e['user'] for e in tail_entries(self.trace_path, 2, block_size=97)], ['alice', 'alice'])
+        self.assertEqual(len(tail_entries(self.trace_path, 100, 'bob', block_size=97)), 1)
+
+    def test_writers_sharing_a_file_rotate_safely(self):
+        # one writer per process in production; each writer has its own lock handle either way
+        trace_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, trace_dir, True)
+        path = os.path.join(trace_dir, 'shared.jsonl')
+
+        def write(name):
+            writer = TraceWriter(path, max_bytes=4000, backup_count=50, queue_size=10, batch_size=5)
+            for i in range(40):
+                writer.write([{'user': name, 'n': i, 'pad': 'x' * 40} for _ in range(5)])
+
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(write, ['w0', 'w1', 'w2', 'w3']))
+        files = [path] + [f'{path}.{i}' for i in range(1, 51) if os.path.exists(f'{path}.{i}')]
+        lines = []
+        for name in files:
+            with open(name, encoding='utf-8') as f:
+                lines.extend(json.loads(line) for line in f)
+            self.assertLessEqual(os.path.getsize(name), 4000)
+        self.assertEqual(len(lines), 4 * 40 * 5)
+        for name in ('w0', 'w1', 'w2', 'w3'):
+            # the index of the current file points at exactly this writer's lines in it
+            self.assertEqual(tail_entries(path, 1000, name), [e for e in tail_entries(path, 1000) if e['user'] == name])
+
+
+class UnreadNotificationCountTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='pw')
+        Profile.objects.create(user=self.user)
+        self.client.force_login(self.user)
+
+    def assert_count(self, expected):
+        self.assertEqual(Notification.objects.filter(user=self.user, read=False).count(), expected)
+        with self.assertNumQueries(1):
+            self.assertEqual(unread_count(self.user), expected)
+
+    def test_count_reads_only_the_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            unread_count(self.user)
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + queries[0]['sql'])
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('COVERING INDEX notif_user_read_created_idx', plan)
+
+    def test_count_follows_every_change(self):
+        self.assertEqual(unread_count(self.user), 0)
+        notes = [Notification.objects.create(user=self.user, message=f"n{i}") for i in range(3)]
+        self.assert_count(3)
+        self.client.get(reverse('mark_notification', args=[notes[0].id]))
+        self.assert_count(2)
+        notes[1].delete()
+        self.assert_count(1)
+        self.client.post(reverse('notifications'))
+        self.assertEqual(unread_count(self.user), 0)
+        self.assert_count(0)
+
+    def test_context_count(self):
+        Notification.objects.create(user=self.user, message='hello')
+        response = self.client.get(reverse('notifications'))
+        self.assertEqual(response.context['unread_notifications'], 1)
+
+
+class NotificationFanOutTests(TestCase):
+
+    def setUp(self):
+        self.recruiter = User.objects.create_user('recruiter', password='pw')
+        Profile.objects.create(user=self.recruiter, user_type='recruiter')
+        self.students = []
+        for i, skills in enumerate([['Python'], ['python', 'django'], ['java'], []]):
+            user = User.objects.create_user(f"student{i}", password='pw')
+            Profile.objects.create(user=user, skills=skills)
+            self.students.append(user)
+
+    def test_post_job_alerts_matching_students(self):
+        self.client.force_login(self.recruiter)
+        self.client.post(reverse('post_job'), {'title': 'Backend', 'description': 'd', 'skills': 'python, django'})
+        alerted = lambda: set(Notification.objects.filter(message__startswith='New job').values_list('user__username', flat=True))
+        # the fan-out is left to the worker
+        self.assertEqual(alerted(), set())
+        self.assertTrue(Job.objects.get().alerts_pending)
+        self.assertEqual(send_job_alerts(), 1)
+        self.assertEqual(alerted(), {'student0', 'student1'})
+        self.assertEqual(unread_count(self.students[1]), 1)
+        self.assertEqual(send_job_alerts(), 0)
+
+    @override_settings(JOB_ALERTS_EAGER=True)
+    def test_eager_alerts_wait_for_the_commit(self):
+        self.client.force_login(self.recruiter)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(reverse('post_job'), {'title': 'Backend', 'description': 'd', 'skills': 'java'})
+        self.assertFalse(Notification.objects.filter(message__startswith='New job').exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(list(Notification.objects.filter(message__startswith='New job').values_list('user', flat=True)),
+                         [self.students[2].pk])
+        self.assertFalse(Job.objects.get().alerts_pending)
+
+    def test_requirement_edits_notify_active_applicants(self):
+        job = Job.objects.create(recruiter=self.recruiter, title='Backend', description='d', required_skills=['python'])
+        Application.objects.create(user=self.students[0], job=job)
+        Application.objects.create(user=self.students[1], job=job, status='withdrawn')
+        notified = lambda: list(Notification.objects.filter(message__contains='have changed').values_list('user', flat=True))
+
+        job.description = 'Backend APIs'
+        job.save()
+        self.assertEqual(notified(), [])
+        job.required_skills = ['python', 'django']
+        job.save()
+        self.assertEqual(notified(), [self.students[0].pk])
+        self.assertEqual(Notification.objects.get(user=self.students[0]).url, reverse('view_job', args=[job.pk]))
+
+    def test_bulk_notify_dedupes_and_chunks(self):
+        ids = [u.id for u in self.students]
+        self.assertEqual(unread_count(self.students[0]), 0)
+        self.assertEqual(notify_users(ids + ids, 'Hello', chunk_size=3), 4)
+        self.assertEqual(notify_users(ids, 'Hello', chunk_size=3), 0)
+        self.assertEqual(Notification.objects.filter(message='Hello').count(), 4)
+        self.assertEqual(unread_count(self.students[0]), 1)
+
+
+class NotificationRetentionTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('recruiter', password='pw')
+        old = timezone.now() - timedelta(days=120)
+        for i in range(5):
+            Notification.objects.create(user=self.user, message=f"old {i}", read=i < 3)
+        Notification.objects.create(user=self.user, message='recent', read=True)
+        Notification.objects.exclude(message='recent').update(created_at=old)
+
+    def test_prune_archives_only_old_read_rows(self):
+        self.assertEqual(prune_read_notifications(days=90, batch_size=2, archive=True), 3)
+        self.assertEqual(
+            sorted(Notification.objects.values_list('message', flat=True)), ['old 3', 'old 4', 'recent']
+        )
+        self.assertEqual(ArchivedNotification.objects.count(), 3)
+
+    def test_inbox_is_paginated(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('notifications') + '?page_size=4')
+        self.assertEqual(response.context['notifications'][0].message, 'recent')
+        self.assertEqual(len(response.context['notifications']), 4)
+        self.assertTrue(response.context['page'].has_next)
+
+
+class OutboxTests(TempMediaRootMixin, TestCase):
+
+    def setUp(self):
+        recruiter = User.objects.create_user('recruiter', email='hr@example.com', password='pw')
+        Profile.objects.create(user=recruiter, user_type='recruiter')
+        self.job = Job.objects.create(recruiter=recruiter, title='Backend', description='d')
+        student = User.objects.create_user('student', password='pw')
+        Profile.objects.create(user=student, resume=SimpleUploadedFile('resume.txt', RESUME_TEXT.encode()))
+        self.client.force_login(student)
+
+    def test_apply_queues_mail_for_the_worker(self):
+        self.client.post(reverse('apply_job', args=[self.job.id]))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.filter(status=OutgoingEmail.STATUS_PENDING).count(), 1)
+
+        self.assertEqual(send_queued_email(), 1)
+        self.assertEqual(mail.outbox[0].to, ['hr@example.com'])
+        self.assertEqual(OutgoingEmail.objects.get().status, OutgoingEmail.STATUS_SENT)
+        self.assertEqual(send_queued_email(), 0)
+
+    @override_settings(EMAIL_BACKEND='userapp.tests.BrokenEmailBackend', EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failed_mail_is_retried_then_given_up(self):
+        self.client.post(reverse('apply_job', args=[self.job.id]))
+        self.assertEqual(send_queued_email(), 0)
+        row = OutgoingEmail.objects.get()
+        self.assertEqual((row.status, row.attempts), (OutgoingEmail.STATUS_PENDING, 1))
+
+        OutgoingEmail.objects.update(next_attempt_at=row.created_at)
+        send_queued_email()
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (OutgoingEmail.STATUS_FAILED, 2))
+
+
+class BrokenEmailBackend(BaseEmailBackend):
+
+    def send_messages(self, messages):
+        raise ConnectionError('mail server unavailable')
@@ -12,16 +12,21 @@ urlpatterns = [
     path("logout/", views.user_logout, name="logout"),
     path("student/dashboard/", views.student_dashboard, name="student_dashboard"),
     path("student/applications/", views.student_applications, name="student_applications"),
+    path("student/recommendations/", views.recommended_jobs, name="recommended_jobs"),
     path("upload-resume/", views.upload_resume, name="upload_resume"),
     path("post-job/", views.post_job, name="post_job"),
     path("apply-job/<int:job_id>/", views.apply_job, name="apply_job"),
     path("edit-company/", views.edit_company_details, name="edit_company"),
     path("ai-chat/", views.ai_chat, name="ai_chat"),
     path('jobs/', views.job_list, name='view_jobs'),
+    path('jobs/search/', views.search_jobs, name='search_jobs'),
     path('recruiter/dashboard/', views.recruiter_dashboard, name='recruiter_dashboard'),
     path('recruiter/post-job/', views.post_job, name='post_job'),
     path('recruiter/applications/',views.recruiter_applications,name='recruiter_applications'),
+    path('recruiter/resume-search/', views.resume_search, name='resume_search'),
     path('recruiter/jobs/', views.recruiter_jobs, name='recruiter_jobs'),
+    path('recruiter/jobs/<int:job_id>/candidates/', views.job_top_candidates, name='job_top_candidates'),
+    path('recruiter/jobs/<int:job_id>/applicants/', views.job_applicants, name='job_applicants'),
     path('job/<int:job_id>/', views.view_job, name='view_job'),
     path('apply-external/<int:job_id>/', views.apply_external, name='apply_external'),
     path('withdraw/<int:application_id>/', views.withdraw_application, name='withdraw_application'),
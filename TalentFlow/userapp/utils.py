@@ -1,16 +1,47 @@
+import hashlib
+import json
 import os
+import re
+import sys
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
 
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
 
-def _extract_resume_text(resume_path):
-    text = ""
+from .scoring_trace import record_score_trace, trace_settings
+from .skills import popcount, skill_forms, skill_id, skill_ids, skill_mask, skill_name
+
+# Bump whenever _extract_resume_text changes in a way that alters its output so
+# text cached by an older extractor is re-extracted instead of reused.
+EXTRACTOR_VERSION = 3
+
+# small per-process memo in front of the ResumeText table: content_hash -> analysis
+_RESUME_TEXT_MEMO = OrderedDict()
+_RESUME_TEXT_MEMO_SIZE = 128
+# True while the queue worker extracts a resume itself (see _analyse_in_queue_worker)
+_OCR_PAGES_IN_PARALLEL = False
+
+
+def iter_resume_pages(resume_path):
+    """Yield the text of a resume piece by piece (PDF pages, DOCX paragraphs, text chunks).
+
+    Joining the pieces gives the full extracted text; nothing is read ahead,
+    so a consumer that stops iterating stops the extraction too.
+    """
     if not resume_path or not os.path.exists(resume_path):
-        return text
+        return
 
     _, ext = os.path.splitext(resume_path)
     ext = ext.lower()
 
     # PDF
     if ext == '.pdf':
+        found_text = False
         try:
             import PyPDF2
             with open(resume_path, 'rb') as f:
@@ -18,25 +49,18 @@ def _extract_resume_text(resume_path):
                 for page in reader.pages:
                     page_text = page.extract_text()
                     if page_text:
-                        text += page_text + ' '
+                        found_text = True
+                        yield page_text + ' '
         except Exception:
             # PyPDF2 not available or extraction failed; fall through to OCR attempt
             pass
 
         # If no text extracted by PyPDF2, attempt OCR on the PDF (useful for scanned PDFs)
-        if not text:
+        if not found_text:
             try:
-                from pdf2image import convert_from_path
-                import pytesseract
-                # convert to images (requires poppler on PATH)
-                images = convert_from_path(resume_path)
-                for img in images:
-                    try:
-                        page_text = pytesseract.image_to_string(img)
-                        if page_text:
-                            text += page_text + ' '
-                    except Exception:
-                        continue
+                for page_text in _ocr_pdf_pages(resume_path):
+                    if page_text:
+                        yield page_text + ' '
             except Exception:
                 # OCR libraries not available or failed; return whatever (possibly empty)
                 pass
@@ -47,19 +71,131 @@ def _extract_resume_text(resume_path):
             import docx
             doc = docx.Document(resume_path)
             for p in doc.paragraphs:
-                text += p.text + ' '
+                yield p.text + ' '
         except Exception:
-            return text
+            return
 
     # Plain text or other
     else:
         try:
             with open(resume_path, 'r', encoding='utf-8', errors='ignore') as f:
-                text = f.read()
+                for chunk in iter(lambda: f.read(65536), ''):
+                    yield chunk
         except Exception:
-            return text
+            return
+
+
+def _extract_resume_text(resume_path, max_chars=None):
+    """Extracted resume text, cut off at RESUME_TEXT_MAX_CHARS characters.
+
+    Extraction stops as soon as the cap is reached, so a very long upload
+    (e.g. a 300-page lab manual) costs no more than a resume-sized one.
+    """
+    if max_chars is None:
+        max_chars = getattr(settings, 'RESUME_TEXT_MAX_CHARS', 100000)
+    parts = []
+    size = 0
+    pages = iter_resume_pages(resume_path)
+    try:
+        for piece in pages:
+            parts.append(piece)
+            size += len(piece)
+            if max_chars and size >= max_chars:
+                break
+    finally:
+        # also stops any OCR still running for later pages
+        pages.close()
+    text = ''.join(parts)
+    return text[:max_chars] if max_chars else text
+
+
+def _ocr_page(resume_path, page_number, dpi):
+    """Render one PDF page and OCR it (runs in an OCR pool worker)."""
+    from pdf2image import convert_from_path
+    import pytesseract
+    # requires poppler on PATH; only this page is held in memory
+    images = convert_from_path(resume_path, dpi=dpi, first_page=page_number, last_page=page_number)
+    return ' '.join(pytesseract.image_to_string(img) for img in images)
+
+
+def _pdf_page_count(resume_path):
+    from pdf2image import pdfinfo_from_path
+    return int(pdfinfo_from_path(resume_path).get('Pages', 0))
+
+
+def _ocr_pdf_pages(resume_path):
+    """Yield the OCR text of each page of a scanned PDF, in page order.
+
+    At most RESUME_OCR_MAX_PAGES pages are rendered, one at a time, at
+    RESUME_OCR_DPI. Pages are OCR'd serially (eager extraction in a request,
+    extraction pool workers) except when the queue worker extracts a single
+    resume itself: then RESUME_OCR_WORKERS > 1 pages run on a process pool.
+    Pages not finished within RESUME_OCR_TIME_BUDGET seconds of the start are
+    skipped.
+    """
+    dpi = getattr(settings, 'RESUME_OCR_DPI', 200)
+    max_pages = getattr(settings, 'RESUME_OCR_MAX_PAGES', 5)
+    workers = getattr(settings, 'RESUME_OCR_WORKERS', 2)
+    deadline = time.monotonic() + getattr(settings, 'RESUME_OCR_TIME_BUDGET', 60)
+
+    pages = range(1, min(_pdf_page_count(resume_path), max_pages) + 1)
+    if workers <= 1 or len(pages) <= 1 or not _OCR_PAGES_IN_PARALLEL:
+        for page_number in pages:
+            if time.monotonic() >= deadline:
+                return
+            try:
+                yield _ocr_page(resume_path, page_number, dpi)
+            except Exception:
+                continue
+        return
+
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(pages)))
+    futures = [pool.submit(_ocr_page, resume_path, n, dpi) for n in pages]
+    try:
+        for future in futures:
+            try:
+                yield future.result(timeout=max(deadline - time.monotonic(), 0))
+            except FutureTimeoutError:
+                return
+            except Exception:
+                continue
+    finally:
+        # over budget (or the caller stopped early): drop queued pages and
+        # return without waiting for the pages still being OCR'd
+        if sys.version_info >= (3, 9):
+            pool.shutdown(wait=False, cancel_futures=True)
+        else:
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+
+def _hash_chunks(chunks):
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
 
-    return text
+def resume_content_hash(resume_file):
+    """Return the sha256 hex digest of a resume file's content.
+
+    Works for both freshly uploaded (uncommitted) files and files already in
+    storage. Returns '' when the file cannot be read.
+    """
+    if not resume_file:
+        return ''
+    try:
+        if not getattr(resume_file, '_committed', True):
+            # new upload that has not been written to storage yet
+            upload = resume_file.file
+            digest = _hash_chunks(upload.chunks())
+            upload.seek(0)
+            return digest
+        with resume_file.open('rb') as f:
+            return _hash_chunks(iter(lambda: f.read(65536), b''))
+    except Exception:
+        return ''
 
 
 def _is_resume_like(text):
@@ -91,182 +227,703 @@ def _is_resume_like(text):
     return False
 
 
-def calculate_ats_score(profile, job, resume_file=None):
-    """Calculate ATS score by matching job skills against resume text.
+EMPTY_RESUME_ANALYSIS = {'text': '', 'is_resume_like': False}
+
+
+def analyse_resume(resume_path):
+    """Extract a resume and derive everything scoring needs from its text.
+
+    Runs in extraction worker processes, so it must not touch the database.
+    """
+    text = _extract_resume_text(resume_path)
+    return {
+        'text': text,
+        'is_resume_like': _is_resume_like(text),
+    }
+
+
+def _memo_get(content_hash):
+    analysis = _RESUME_TEXT_MEMO.get(content_hash)
+    if analysis is not None:
+        _RESUME_TEXT_MEMO.move_to_end(content_hash)
+    return analysis
+
+
+def _memo_put(content_hash, analysis):
+    _RESUME_TEXT_MEMO[content_hash] = analysis
+    _RESUME_TEXT_MEMO.move_to_end(content_hash)
+    while len(_RESUME_TEXT_MEMO) > _RESUME_TEXT_MEMO_SIZE:
+        _RESUME_TEXT_MEMO.popitem(last=False)
+
+
+def _row_analysis(row):
+    if row.status != row.STATUS_DONE:
+        return EMPTY_RESUME_ANALYSIS
+    return {
+        'text': row.text,
+        'is_resume_like': row.is_resume_like,
+    }
+
+
+def _store_analysis(row, analysis):
+    row.text = analysis['text']
+    row.is_resume_like = analysis['is_resume_like']
+    row.status = row.STATUS_DONE
+    row.save(update_fields=['text', 'is_resume_like', 'status', 'attempts', 'updated_at'])
+    # scores computed while the resume was pending fell back to profile skills
+    invalidate_scores_for_resume(row.content_hash)
+
+
+def forget_resume_text(content_hash):
+    """Drop cached text for a content hash (memo and ResumeText rows)."""
+    from .models import ResumeText
+
+    if not content_hash:
+        return
+    _RESUME_TEXT_MEMO.pop(content_hash, None)
+    ResumeText.objects.filter(content_hash=content_hash).delete()
+
+
+def enqueue_resume_extraction(resume_file):
+    """Queue a stored resume for background extraction.
+
+    Returns the ResumeText row. With settings.RESUME_EXTRACTION_EAGER the file
+    is processed immediately instead (useful for tests and local development).
+    """
+    from .models import ResumeText
+
+    if not resume_file:
+        return None
+    owner = getattr(resume_file, 'instance', None)
+    content_hash = getattr(owner, 'resume_hash', '') or resume_content_hash(resume_file)
+    if not content_hash:
+        return None
+
+    row, created = ResumeText.objects.get_or_create(
+        content_hash=content_hash,
+        extractor_version=EXTRACTOR_VERSION,
+        defaults={'source_name': resume_file.name},
+    )
+    if row.status == row.STATUS_PENDING and row.source_name != resume_file.name:
+        row.source_name = resume_file.name
+        row.save(update_fields=['source_name', 'updated_at'])
+    if row.status == row.STATUS_PENDING and getattr(settings, 'RESUME_EXTRACTION_EAGER', False):
+        _store_analysis(row, analyse_resume(resume_file.path))
+    return row
+
+
+def get_resume_analysis(resume_file):
+    """Return the precomputed analysis for a resume FieldFile.
+
+    Reads the in-process memo, then the ResumeText table. A resume that has not
+    been extracted yet is queued and EMPTY_RESUME_ANALYSIS returned, so request
+    handlers never parse files themselves (unless extraction is eager).
+    """
+    from .models import ResumeText
+
+    if not resume_file:
+        return EMPTY_RESUME_ANALYSIS
+    owner = getattr(resume_file, 'instance', None)
+    content_hash = getattr(owner, 'resume_hash', '')
+    if content_hash:
+        analysis = _memo_get(content_hash)
+        if analysis is not None:
+            return analysis
+        row = ResumeText.objects.filter(
+            content_hash=content_hash, extractor_version=EXTRACTOR_VERSION
+        ).first()
+    else:
+        row = None
+
+    if row is None or row.status == row.STATUS_PENDING:
+        try:
+            row = enqueue_resume_extraction(resume_file)
+        except Exception:
+            row = None
+        if row is None or row.status == row.STATUS_PENDING:
+            return EMPTY_RESUME_ANALYSIS
+
+    analysis = _row_analysis(row)
+    _memo_put(row.content_hash, analysis)
+    return analysis
+
+
+def _resume_hash(resume_file):
+    return getattr(getattr(resume_file, 'instance', None), 'resume_hash', '')
+
+
+def load_resume_analyses(resume_files):
+    """Analyses of several resumes read with one query, as {content_hash: analysis}.
+
+    Resumes that have not been extracted yet are left out.
+    """
+    from .models import ResumeText
+
+    hashes = {h for h in map(_resume_hash, resume_files) if h}
+    if not hashes:
+        return {}
+    rows = ResumeText.objects.filter(
+        content_hash__in=hashes,
+        extractor_version=EXTRACTOR_VERSION,
+    ).exclude(status=ResumeText.STATUS_PENDING)
+    return {row.content_hash: _row_analysis(row) for row in rows}
+
+
+def prefetch_resume_analyses(resume_files):
+    """Load the analyses of several resumes into the memo with one query."""
+    missing = [f for f in resume_files if _resume_hash(f) not in _RESUME_TEXT_MEMO]
+    for content_hash, analysis in load_resume_analyses(missing).items():
+        _memo_put(content_hash, analysis)
+
+
+def _extraction_pool(workers):
+    """Process pool for resume extraction; its workers OCR serially."""
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def _unclaimed(now):
+    """Rows no worker is extracting: never claimed, or claimed longer than the lease ago."""
+    lease = timedelta(seconds=getattr(settings, 'RESUME_EXTRACTION_LEASE', 600))
+    return Q(claimed_at__isnull=True) | Q(claimed_at__lt=now - lease)
+
 
-    Falls back to `profile.get_skills()` when no resume text is available.
-    Keeps existing CGPA/experience/certification components.
+def _claim_resume_row(row, now):
+    """Claim a pending row for extraction; False when another worker got it first.
+
+    The conditional UPDATE succeeds for exactly one of the workers that picked
+    the same row. A claim older than RESUME_EXTRACTION_LEASE seconds (its
+    worker died) can be taken over.
     """
-    profile_skills = profile.get_skills()
-    profile_certs = profile.get_certifications()
+    from .models import ResumeText
+
+    claimed = ResumeText.objects.filter(
+        _unclaimed(now), pk=row.pk, status=ResumeText.STATUS_PENDING,
+    ).update(claimed_at=now)
+    row.claimed_at = now
+    return claimed == 1
 
-    job_skills = job.get_required_skills()
-    job_certs = job.get_required_certifications()
 
-    # Try to extract resume text if present on profile
-    resume_text = ""
+def _analyse_in_queue_worker(resume_path):
+    """analyse_resume run by the queue worker itself, OCR'ing scanned pages on a process pool."""
+    global _OCR_PAGES_IN_PARALLEL
+    _OCR_PAGES_IN_PARALLEL = True
     try:
-        # If a resume_file (Application.resume or uploaded file) is provided, prefer it
-        resume_path = None
-        if resume_file:
-            resume_path = getattr(resume_file, 'path', None)
-        # otherwise fall back to profile.resume
-        if not resume_path and hasattr(profile, 'resume') and profile.resume:
-            resume_path = getattr(profile.resume, 'path', None)
-
-        if resume_path:
-            resume_text = _extract_resume_text(resume_path)
-            # Only treat file as resume if heuristic passes
-            if not _is_resume_like(resume_text):
-                resume_text = ""
+        return analyse_resume(resume_path)
+    finally:
+        _OCR_PAGES_IN_PARALLEL = False
+
+
+def _store_extraction(row, get_analysis, max_attempts):
+    row.attempts += 1
+    try:
+        _store_analysis(row, get_analysis())
     except Exception:
-        resume_text = ""
+        row.status = row.STATUS_FAILED if row.attempts >= max_attempts else row.STATUS_PENDING
+        row.claimed_at = None
+        row.save(update_fields=['attempts', 'status', 'claimed_at', 'updated_at'])
 
-    score = 0
-
-    # Skills match (40%) - prefer resume-based matching
-    skill_score = 0
-    if job_skills:
-        if resume_text and resume_text.strip():
-            # Match on word boundaries to avoid substring false positives
-            import re
-            resume_lower = resume_text.lower()
-            matched_skills = 0
-            for s in job_skills:
-                if not s or len(s.strip()) <= 2:
-                    continue
-                pattern = r"\b" + re.escape(s.strip().lower()) + r"\b"
-                if re.search(pattern, resume_lower):
-                    matched_skills += 1
 
-            # If resume looked like resume but no skills matched, fallback to profile skills
-            if matched_skills == 0:
-                matched_skills = len(set(profile_skills) & set(job_skills))
+def _process_resume_rows(rows, workers=None):
+    """Claim pending ResumeText rows and extract them in parallel on a local process pool.
 
-            skill_score = (matched_skills / len(job_skills)) * 40
-        else:
-            matched_skills = len(set(profile_skills) & set(job_skills))
-            skill_score = (matched_skills / len(job_skills)) * 40
-    score += skill_score
-
-    # CGPA match (30%)
-    edu_score = min((profile.cgpa / job.min_cgpa) * 30, 30) if getattr(job, 'min_cgpa', None) else 0
-    score += edu_score
-
-    # Experience match (20%)
-    exp_score = min((profile.experience / job.min_experience) * 20, 20) if getattr(job, 'min_experience', None) else 0
-    score += exp_score
-
-    # Certifications match (10%)
-    cert_score = 0
-    if job_certs:
-        matched_cert = len(set(profile_certs) & set(job_certs))
-        cert_score = (matched_cert / len(job_certs)) * 10
-    score += cert_score
-
-    # Debug logging to help diagnose scoring issues
-    try:
-        debug_path = os.path.join(os.getcwd(), 'ats_debug.log')
-        user_ident = 'anonymous'
+    A single claimed row is extracted in this process instead, with its
+    scanned pages OCR'd in parallel. Returns the number of rows claimed; rows
+    claimed by another worker are skipped.
+    """
+    from django.core.files.storage import default_storage
+
+    now = timezone.now()
+    rows = [row for row in rows if _claim_resume_row(row, now)]
+    if not rows:
+        return 0
+    max_attempts = getattr(settings, 'RESUME_EXTRACTION_MAX_ATTEMPTS', 3)
+    workers = workers or getattr(settings, 'RESUME_EXTRACTION_WORKERS', 2)
+    paths = []
+    for row in rows:
         try:
-            if profile and hasattr(profile, 'user') and profile.user:
-                user_ident = getattr(profile.user, 'username', str(getattr(profile.user, 'id', 'user')))
+            paths.append(default_storage.path(row.source_name))
         except Exception:
-            user_ident = 'anonymous'
+            paths.append('')
+
+    if len(rows) == 1:
+        _store_extraction(rows[0], lambda: _analyse_in_queue_worker(paths[0]), max_attempts)
+        return 1
+    with _extraction_pool(min(workers, len(rows))) as pool:
+        futures = [pool.submit(analyse_resume, path) for path in paths]
+        for row, future in zip(rows, futures):
+            _store_extraction(row, future.result, max_attempts)
+    return len(rows)
+
+
+def process_resume_queue(limit=50, workers=None):
+    """Extract up to `limit` pending resumes on a local process pool.
+
+    Returns the number of rows processed. Called by the process_resume_queue
+    management command; failures are retried up to RESUME_EXTRACTION_MAX_ATTEMPTS.
+    Each row is claimed before extraction, so concurrent workers never extract
+    the same resume twice.
+    """
+    from .models import ResumeText
+
+    max_attempts = getattr(settings, 'RESUME_EXTRACTION_MAX_ATTEMPTS', 3)
+    rows = list(ResumeText.objects.filter(
+        _unclaimed(timezone.now()), status=ResumeText.STATUS_PENDING, attempts__lt=max_attempts
+    ).order_by('created_at')[:limit])
+    return _process_resume_rows(rows, workers)
+
+
+def resume_analyses_for_scoring(resume_files):
+    """{content_hash: analysis} covering every given resume, to pass to score_profile_against_jobs.
+
+    Used where a request needs many resumes at once (e.g. ranking applicants).
+    Extracted resumes cost one query in total. The rest are queued for
+    process_resume_queue and count as having no text, so they are scored from
+    profile skills like in the listings; storing their text later drops those
+    scores. Unlike the memo, the result holds every resume however many there are.
+    """
+    resume_files = [f for f in resume_files if f]
+    analyses = load_resume_analyses(resume_files)
+    for resume_file in resume_files:
+        content_hash = _resume_hash(resume_file)
+        if not content_hash or content_hash in analyses:
+            continue
+        row = enqueue_resume_extraction(resume_file)
+        analyses[content_hash] = _row_analysis(row) if row is not None else EMPTY_RESUME_ANALYSIS
+    return analyses
+
+
+def _resume_analysis_for(resume_file):
+    """Analysis of a resume FieldFile, or the empty analysis if none is usable."""
+    try:
+        return get_resume_analysis(resume_file)
+    except Exception:
+        return EMPTY_RESUME_ANALYSIS
+
+
+_WORD_CHAR_RE = re.compile(r"\w")
+
+
+def _is_word_boundary(text, i):
+    """Same test as the regex `\\b` at index i of text."""
+    before = i > 0 and _WORD_CHAR_RE.match(text[i - 1]) is not None
+    after = i < len(text) and _WORD_CHAR_RE.match(text[i]) is not None
+    return before != after
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton that finds a fixed set of lowercased skills in one pass.
+
+    `find` walks the text once, whatever the number of skills, and reports a
+    skill only where it is bounded by word boundaries on both sides -- the
+    same result as running `\\b<skill>\\b` once per skill.
+    """
+
+    def __init__(self, skills):
+        self.skills = frozenset(skills)
+        goto = [{}]
+        outputs = [()]
+        for skill in self.skills:
+            node = 0
+            for ch in skill:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    outputs.append(())
+                node = nxt
+            outputs[node] = ((skill, len(skill)),)
+
+        # breadth-first so a node's failure target is complete before its children use it
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:
+            for ch, child in goto[node].items():
+                queue.append(child)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(ch, 0)
+                outputs[child] = outputs[child] + outputs[fail[child]]
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+
+    def find(self, text):
+        """Return the set of skills occurring as whole words in `text` (already lowercased)."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set()
+        wanted = len(self.skills)
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for skill, length in outputs[node]:
+                if skill not in found \
+                        and _is_word_boundary(text, i + 1 - length) and _is_word_boundary(text, i + 1):
+                    found.add(skill)
+                    if len(found) == wanted:
+                        return found
+        return found
+
+
+@lru_cache(maxsize=64)
+def _skill_matcher(skills):
+    """Matcher for a skill vocabulary (a sorted tuple), built once per distinct vocabulary.
+
+    Changing a job's required skills changes the vocabulary and so the cache
+    key; matchers for vocabularies no longer in use age out of the cache.
+    """
+    return SkillMatcher(skills)
 
-        job_ident = getattr(job, 'id', None)
-        job_title = getattr(job, 'title', '')
 
-        resume_info = {
-            'resume_path': resume_path if 'resume_path' in locals() else None,
-            'resume_text_len': len(resume_text) if resume_text else 0,
-            'is_resume_like': _is_resume_like(resume_text) if resume_text else False,
-        }
+def _find_skills(text_lower, skills):
+    """Return the subset of `skills` (lowercased) found as whole words in text_lower."""
+    skills = tuple(sorted(set(s for s in skills if s)))
+    if not text_lower or not skills:
+        return set()
+    return _skill_matcher(skills).find(text_lower)
 
-        # try to record matched skills counts
+
+class ScoringProfile:
+    """Immutable snapshot of everything scoring needs from a Profile.
+
+    Build it once per request with `from_profile` and pass it to the scoring
+    functions in place of the Profile: skills are already a bitset of canonical
+    ids (see skills.skill_mask) and certifications a set, so the scoring loops
+    never decode JSON or resolve the resume again.
+    """
+    __slots__ = ('user', 'skill_mask', 'cert_set', 'cgpa', 'experience', 'resume')
+
+    def __init__(self, user=None, skill_ids=(), cert_set=frozenset(), cgpa=0,
+                 experience=0, resume=None):
+        for name, value in (
+            ('user', user), ('skill_mask', skill_mask(skill_ids)), ('cert_set', frozenset(cert_set)),
+            ('cgpa', cgpa or 0), ('experience', experience or 0), ('resume', resume or None),
+        ):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ScoringProfile is immutable")
+
+    @classmethod
+    def from_profile(cls, profile):
+        """Snapshot of `profile` (a Profile, a ScoringProfile or None)."""
+        if isinstance(profile, cls):
+            return profile
+        if profile is None:
+            return cls()
+        resume = profile.resume or None
+        return cls(
+            user=profile.user,
+            skill_ids=skill_ids(profile.get_skills()),
+            cert_set=profile.get_certifications(),
+            cgpa=profile.cgpa,
+            experience=profile.experience,
+            resume=resume,
+        )
+
+
+def score_profile_against_jobs(profile, jobs, resume_files=None, analyses=None):
+    """Score one profile against many jobs in a single pass.
+
+    `profile` is a Profile or a ScoringProfile built from one. `resume_files`
+    optionally maps job id -> resume FieldFile to score that job against
+    (e.g. the resume attached to an application); other jobs use the profile
+    resume. Each distinct resume is read once and searched once for the union
+    of all job skills. `analyses` optionally maps content hash -> resume
+    analysis (see resume_analyses_for_scoring); resumes found there are not looked up.
+
+    Returns {job.id: {score, matched, missing, used_resume, resume_snippet,
+    skill_score, edu_score, exp_score, cert_score, ...}} with the same values
+    `calculate_ats_score` and `get_skill_match` give for each pair.
+    """
+    resume_files = resume_files or {}
+    analyses = analyses or {}
+    trace_conf = trace_settings()
+    snapshot = ScoringProfile.from_profile(profile)
+    profile_mask = snapshot.skill_mask
+    profile_cert_set = snapshot.cert_set
+    cgpa = snapshot.cgpa
+    experience = snapshot.experience
+    profile_resume = snapshot.resume
+
+    # decode each job's requirements once and group jobs by the resume they use
+    groups = OrderedDict()
+    for job in jobs:
+        source = resume_files.get(job.pk)
+        if not (source and getattr(source, 'path', None)):
+            source = profile_resume if profile_resume else None
+        key = source.name if source else ''
+        job_skills = skill_ids(job.get_required_skills() or [])
+        # only skills with canonical names longer than 2 count as resume matches
+        long_mask = skill_mask(sid for sid in job_skills if len(skill_name(sid)) > 2)
+        groups.setdefault(key, (source, []))[1].append(
+            (job, job_skills, skill_mask(job_skills), long_mask, job.get_required_certifications() or [])
+        )
+
+    prefetch_resume_analyses(
+        source for source, _ in groups.values() if source and _resume_hash(source) not in analyses
+    )
+
+    results = {}
+    for source, entries in groups.values():
+        resume_path = None
+        resume_text = ""
         try:
-            import re as _re
-            resume_lower = resume_text.lower() if resume_text else ''
-            matched_resume = 0
-            for s in job_skills or []:
-                if not s or len(s.strip()) <= 2:
-                    continue
-                pattern = r"\b" + _re.escape(s.strip().lower()) + r"\b"
-                if resume_text and _re.search(pattern, resume_lower):
-                    matched_resume += 1
-            matched_profile = len(set(profile_skills) & set(job_skills)) if profile_skills and job_skills else 0
+            resume_path = getattr(source, 'path', None) if source else None
+            if resume_path:
+                analysis = analyses.get(_resume_hash(source)) or _resume_analysis_for(source)
+                # Only treat file as resume if heuristic passes
+                if analysis['is_resume_like']:
+                    resume_text = analysis['text']
         except Exception:
+            resume_text = ""
+        used_resume = bool(resume_text)
+        has_resume_text = bool(resume_text.strip())
+        resume_lower = resume_text.lower()
+
+        # one search over the resume for every spelling of every skill these jobs need
+        wanted = set()
+        for _, job_skills, _, _, _ in entries:
+            for sid in job_skills:
+                if len(skill_name(sid)) > 1:
+                    wanted.update(skill_forms(sid))
+        found = skill_mask(skill_id(form) for form in _find_skills(resume_lower, wanted)) if used_resume else 0
+        snippet = (resume_text[:800] + '...') if resume_text else ''
+
+        for job, job_skills, job_mask, long_mask, job_certs in entries:
+            # Skills match (40%) - prefer resume-based matching, word-boundary matched
+            skill_score = 0
             matched_resume = 0
-            matched_profile = len(set(profile_skills) & set(job_skills)) if profile_skills and job_skills else 0
-
-        with open(debug_path, 'a', encoding='utf-8') as df:
-            from datetime import datetime as _dt
-            df.write(f"[{_dt.utcnow().isoformat()}] user={user_ident} job_id={job_ident} title={job_title}\n")
-            df.write(f"  resume_path={resume_info['resume_path']} resume_len={resume_info['resume_text_len']} is_resume_like={resume_info['is_resume_like']}\n")
-            df.write(f"  matched_resume={matched_resume} matched_profile={matched_profile} job_skills_count={len(job_skills) if job_skills else 0}\n")
-            df.write(f"  skill_score={skill_score:.2f} edu_score={edu_score:.2f} exp_score={exp_score:.2f} cert_score={cert_score:.2f} total_score={round(score,2):.2f}\n\n")
-    except Exception:
-        pass
+            matched_profile = popcount(profile_mask & job_mask)
+            if job_skills:
+                if has_resume_text:
+                    matched_resume = popcount(found & long_mask)
+                    matched_skills = matched_resume
+                    # If resume looked like resume but no skills matched, fallback to profile skills
+                    if matched_skills == 0:
+                        matched_skills = matched_profile
+                else:
+                    matched_skills = matched_profile
+                skill_score = (matched_skills / len(job_skills)) * 40
+
+            # CGPA match (30%)
+            edu_score = min((cgpa / job.min_cgpa) * 30, 30) if getattr(job, 'min_cgpa', None) else 0
+            # Experience match (20%)
+            exp_score = min((experience / job.min_experience) * 20, 20) if getattr(job, 'min_experience', None) else 0
+            # Certifications match (10%)
+            cert_score = 0
+            if job_certs:
+                matched_cert = len(profile_cert_set & set(job_certs))
+                cert_score = (matched_cert / len(job_certs)) * 10
+
+            score = 0
+            score += skill_score
+            score += edu_score
+            score += exp_score
+            score += cert_score
+
+            matched = []
+            missing = []
+            for sid, token in job_skills.items():
+                if len(skill_name(sid)) <= 1:
+                    continue
+                if used_resume:
+                    matched_here = found >> sid & 1
+                else:
+                    # fallback to profile skills
+                    matched_here = profile_mask >> sid & 1
+                (matched if matched_here else missing).append(token)
+
+            result = {
+                'score': round(score, 2),
+                'skill_score': skill_score,
+                'edu_score': edu_score,
+                'exp_score': exp_score,
+                'cert_score': cert_score,
+                'matched': matched,
+                'missing': missing,
+                'used_resume': used_resume,
+                'resume_snippet': snippet,
+                'resume_path': resume_path,
+                'resume_text_len': len(resume_text),
+                'matched_resume': matched_resume,
+            }
+            record_score_trace(snapshot, job, result, matched_profile, len(job_skills), trace_conf)
+            results[job.pk] = result
+    return results
 
-    return round(score, 2)
+
+def calculate_ats_score(profile, job, resume_file=None):
+    """Calculate ATS score by matching job skills against resume text.
+
+    Falls back to the profile skills when no resume text is available.
+    Keeps existing CGPA/experience/certification components. `profile` may be
+    a Profile or a ScoringProfile.
+    """
+    resume_files = {job.pk: resume_file} if resume_file else None
+    return score_profile_against_jobs(profile, [job], resume_files)[job.pk]['score']
 
 
 def get_skill_match(profile, job, resume_file=None):
     """Return matched and missing skills between a resume/profile and a job.
 
+    `profile` may be a Profile or a ScoringProfile.
     Returns dict: {matched: [...], missing: [...], used_resume: bool, resume_snippet: str}
     """
-    profile_skills = profile.get_skills() if profile else []
-    job_skills = job.get_required_skills() or []
+    resume_files = {job.pk: resume_file} if resume_file else None
+    result = score_profile_against_jobs(profile, [job], resume_files)[job.pk]
+    return {
+        'matched': result['matched'],
+        'missing': result['missing'],
+        'used_resume': result['used_resume'],
+        'resume_snippet': result['resume_snippet']
+    }
 
-    # Determine resume text (prefer provided resume_file)
-    resume_text = ""
-    used_resume = False
-    try:
-        resume_path = None
-        if resume_file:
-            resume_path = getattr(resume_file, 'path', None)
-        if not resume_path and profile and hasattr(profile, 'resume') and profile.resume:
-            resume_path = getattr(profile.resume, 'path', None)
-
-        if resume_path:
-            resume_text = _extract_resume_text(resume_path)
-            if _is_resume_like(resume_text):
-                used_resume = True
-            else:
-                resume_text = ""
-    except Exception:
-        resume_text = ""
 
-    matched = []
-    missing = []
+def invalidate_scores_for_resume(content_hash):
+    """Drop materialized scores of every student/job pair that uses this resume.
 
-    import re
-    resume_lower = resume_text.lower() if resume_text else ''
+    Two DELETEs with subqueries, however many applications share the resume.
+    """
+    from .models import Application, AtsScore, Profile
 
-    for s in job_skills:
-        if not s or len(s.strip()) <= 1:
-            continue
-        token = s.strip()
-        pattern = r"\b" + re.escape(token.lower()) + r"\b"
-        matched_here = False
-        if used_resume and resume_text:
-            if re.search(pattern, resume_lower):
-                matched_here = True
-        else:
-            # fallback to profile skills
-            if token in profile_skills or token.lower() in [p.lower() for p in profile_skills]:
-                matched_here = True
+    if not content_hash:
+        return
+    AtsScore.objects.filter(user_id__in=Profile.objects.filter(resume_hash=content_hash).values('user_id')).delete()
+    applications = Application.objects.filter(resume_hash=content_hash)
+    AtsScore.objects.filter(
+        Exists(applications.filter(user_id=OuterRef('user_id'), job_id=OuterRef('job_id'))),
+        user_id__in=applications.values('user_id'),
+    ).delete()
 
-        if matched_here:
-            matched.append(token)
-        else:
-            missing.append(token)
 
-    snippet = (resume_text[:800] + '...') if resume_text else ''
-    return {
-        'matched': matched,
-        'missing': missing,
-        'used_resume': used_resume,
-        'resume_snippet': snippet
-    }
+def ensure_ats_scores(user, jobs):
+    """Return {job_id: AtsScore} for `jobs`, computing only the missing rows.
+
+    Existing rows are read with one indexed query; missing ones are scored in a
+    single `score_profile_against_jobs` pass (preferring the resume attached to
+    an active application) and saved with bulk_create.
+    """
+    from .models import Application, AtsScore
+
+    jobs = list(jobs)
+    scores = {s.job_id: s for s in AtsScore.objects.filter(user=user, job__in=[j.pk for j in jobs])}
+    missing = [job for job in jobs if job.pk not in scores]
+    if not missing:
+        return scores
+
+    apps = Application.objects.filter(
+        user=user, status='applied', job__in=[j.pk for j in missing]
+    ).order_by('-id')
+    resume_files = {app.job_id: app.resume for app in apps}
+    results = score_profile_against_jobs(user.profile, missing, resume_files)
+    new_rows = [
+        AtsScore(
+            user=user,
+            job=job,
+            score=results[job.pk]['score'],
+            matched_skills=json.dumps(results[job.pk]['matched']),
+            missing_skills=json.dumps(results[job.pk]['missing']),
+            used_resume=results[job.pk]['used_resume'],
+        )
+        for job in missing
+    ]
+    AtsScore.objects.bulk_create(new_rows, ignore_conflicts=True)
+    for row in new_rows:
+        scores[row.job_id] = row
+    return scores
+
+
+def fill_ats_scores(limit=50, block=500):
+    """Store the missing AtsScore rows of up to `limit` students; return how many were filled.
+
+    Listings sorted or filtered by score read only stored rows, so this runs
+    outside requests (see the fill_ats_scores command), after edits dropped
+    stale scores. Students are found with one query; each is scored against
+    the jobs it has no row for, `block` jobs per engine call.
+    """
+    from django.db.models import Count
+    from .models import Job, Profile
+
+    job_count = Job.objects.count()
+    if not job_count:
+        return 0
+    profiles = list(
+        Profile.objects.filter(user_type='student')
+        .annotate(stored=Count('user__ats_scores'))
+        .filter(stored__lt=job_count)
+        .select_related('user').order_by('pk')[:limit]
+    )
+    for profile in profiles:
+        jobs = list(Job.objects.exclude(ats_scores__user=profile.user_id).order_by('pk'))
+        for start in range(0, len(jobs), block):
+            ensure_ats_scores(profile.user, jobs[start:start + block])
+    return len(profiles)
+
+
+def top_candidates_for_job(job, limit=10):
+    """Students sharing the most skills with `job`, ranked in SQL via the Skill index.
+
+    Each returned Profile carries `matched_count` and `matched_skill_list`.
+    """
+    from django.db.models import Count, Prefetch
+    from .models import Profile, Skill
+
+    skill_ids = list(job.skill_set.values_list('id', flat=True))
+    if not skill_ids:
+        return []
+    return list(
+        Profile.objects.filter(user_type='student', skill_set__in=skill_ids)
+        .annotate(matched_count=Count('skill_set'))
+        .order_by('-matched_count', '-cgpa', '-experience', 'id')
+        .select_related('user')
+        .prefetch_related(Prefetch(
+            'skill_set',
+            queryset=Skill.objects.filter(id__in=skill_ids).order_by('name'),
+            to_attr='matched_skill_list',
+        ))[:limit]
+    )
+
+
+def rank_applicants(job):
+    """Score every active applicant of `job` and return them best first.
+
+    Returns a list of (Application, AtsScore). Stored scores are read with one
+    query; for the rest, resume analyses are loaded in bulk (resumes not
+    extracted yet are queued), scored from that local map and saved with
+    bulk_create.
+    """
+    from .models import Application, AtsScore
+
+    apps = list(
+        Application.objects.filter(job=job, status='applied')
+        .select_related('user', 'user__profile')
+    )
+    scores = {s.user_id: s for s in AtsScore.objects.filter(job=job, user__in=[a.user_id for a in apps])}
+    missing = [app for app in apps if app.user_id not in scores and hasattr(app.user, 'profile')]
+    if missing:
+        analyses = resume_analyses_for_scoring(
+            [app.resume if app.resume else app.user.profile.resume for app in missing]
+        )
+        new_rows = []
+        for app in missing:
+            result = score_profile_against_jobs(
+                app.user.profile, [job], {job.pk: app.resume}, analyses=analyses
+            )[job.pk]
+            new_rows.append(AtsScore(
+                user=app.user,
+                job=job,
+                score=result['score'],
+                matched_skills=json.dumps(result['matched']),
+                missing_skills=json.dumps(result['missing']),
+                used_resume=result['used_resume'],
+            ))
+        AtsScore.objects.bulk_create(new_rows, ignore_conflicts=True)
+        scores.update((row.user_id, row) for row in new_rows)
+
+    ranked = [(app, scores[app.user_id]) for app in apps if app.user_id in scores]
+    ranked.sort(key=lambda pair: (-pair[1].score, pair[0].applied_at))
+    return ranked
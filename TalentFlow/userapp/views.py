@@ -5,14 +5,24 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.urls import reverse
 from django.utils import timezone
-from .models import Profile, Job, Application, Notification
-from django.core.mail import send_mail
-from django.conf import settings
+from .models import Profile, Job, Application, AtsScore, Notification
 from django.contrib.admin.views.decorators import staff_member_required
 import json
-from .forms import CustomUserCreationForm, ProfileForm,RegisterProfileForm
-from .utils import calculate_ats_score, get_skill_match
+from .pagination import keyset_paginate
+from .notifications import mark_all_read, notify_users, queue_job_alerts
+from .outbox import queue_email
+from .recommendations import recommend_jobs
+from .resume_search import QueryError, search_resumes
+from .search import search_jobs as find_jobs
+from .scoring_trace import tail_entries, trace_settings
+from .skills import skill_ids
+from .forms import CustomUserCreationForm, RegisterProfileForm
+from .utils import (
+    score_profile_against_jobs, ensure_ats_scores, enqueue_resume_extraction,
+    top_candidates_for_job, rank_applicants, _resume_analysis_for,
+)
 from django.views.decorators.http import require_POST
+from django.http import JsonResponse, StreamingHttpResponse
 
 
 
@@ -121,20 +131,68 @@ def user_logout(request):
     return redirect('index')
 
 
+def _active_applications_by_job(user):
+    """Map job id -> the user's active ('applied') application, in one query."""
+    # iterate newest first so the oldest application wins, as .first() did
+    apps = Application.objects.filter(user=user, status='applied').order_by('-id')
+    return {app.job_id: app for app in apps}
+
+
+def _scored_job_page(request):
+    """Page of jobs for the current student with their materialized ATS scores.
+
+    Jobs are newest first by default; ?order=score sorts by score and
+    ?min_score= filters on it. Scores shown are materialized AtsScore rows.
+    The default listing computes the page's missing ones in one batch. Sorting
+    or filtering by score pages through the stored rows on the
+    (user, -score, -job) index, so jobs not yet scored by the fill_ats_scores
+    command are left out until it runs.
+    """
+    user = request.user
+    active_apps = _active_applications_by_job(user)
+    order_by_score = request.GET.get('order') == 'score'
+    try:
+        min_score = float(request.GET['min_score'])
+    except (KeyError, TypeError, ValueError):
+        min_score = None
+
+    if order_by_score or min_score is not None:
+        scores = AtsScore.objects.filter(user=user).select_related('job')
+        if min_score is not None:
+            scores = scores.filter(score__gte=min_score)
+        ordering = ('-score', '-job_id') if order_by_score else ('-job_id',)
+        page = keyset_paginate(request, scores, ordering)
+        rows = [(score.job, score) for score in page.items]
+    else:
+        page = keyset_paginate(request, Job.objects.all())
+        stored = ensure_ats_scores(user, page.items)
+        rows = [(job, stored[job.pk]) for job in page.items]
+
+    items = [{
+        'job': job,
+        'score': score.score,
+        'already_applied': job.pk in active_apps,
+        'matched_skills': score.get_matched_skills(),
+        'missing_skills': score.get_missing_skills(),
+        'used_resume': score.used_resume,
+    } for job, score in rows]
+    return page, items
+
+
 @login_required
 def dashboard(request):
     profile = request.user.profile
-    jobs = Job.objects.all()
+    page, items = _scored_job_page(request)
 
     jobs_with_score = []
-    for job in jobs:
-        score = calculate_ats_score(profile, job)
-        recommendation = "Apply" if score >= 70 else "Improve Resume"
-        jobs_with_score.append({'job': job, 'score': score, 'recommendation': recommendation})
+    for item in items:
+        recommendation = "Apply" if item['score'] >= 70 else "Improve Resume"
+        jobs_with_score.append({'job': item['job'], 'score': item['score'], 'recommendation': recommendation})
 
     return render(request, 'dashboard.html', {
         'profile': profile,
-        'jobs_with_score': jobs_with_score
+        'jobs_with_score': jobs_with_score,
+        'page': page
     })
 # ==========================
 # STUDENT DASHBOARD
@@ -142,55 +200,67 @@ def dashboard(request):
 @login_required
 def student_dashboard(request):
     profile = request.user.profile
-    # notification count
-    unread_count = Notification.objects.filter(user=request.user, read=False).count()
-    jobs = Job.objects.all()
+    # only the visible page of jobs is read (or scored, the first time)
+    page, items = _scored_job_page(request)
 
     jobs_with_score = []
-    for job in jobs:
-        # if the student already applied with a resume, prefer that resume for scoring
-        app = Application.objects.filter(user=request.user, job=job, status='applied').first()
-        ats_score = calculate_ats_score(profile, job, resume_file=(app.resume if app else None))
-        breakdown = get_skill_match(profile, job, resume_file=(app.resume if app else None))
-        recommendation = "Apply" if ats_score >= 70 else "Consider Improving Resume"
-        already_applied = Application.objects.filter(user=request.user, job=job, status='applied').exists()
-        jobs_with_score.append({
-            'job': job,
-            'score': ats_score,
-            'recommendation': recommendation,
-            'already_applied': already_applied,
-            'matched_skills': breakdown['matched'],
-            'missing_skills': breakdown['missing'],
-            'used_resume': breakdown['used_resume']
-        })
+    for item in items:
+        item['recommendation'] = "Apply" if item['score'] >= 70 else "Consider Improving Resume"
+        jobs_with_score.append(item)
 
-    return render(request, "student_dashboard.html", {"jobs_with_score": jobs_with_score, "profile": profile, "unread_notifications": unread_count})
+    return render(request, "student_dashboard.html", {"jobs_with_score": jobs_with_score, "profile": profile, "page": page})
+
+
+@login_required
+def recommended_jobs(request):
+    """JSON list of the student's best scoring jobs (?k=, default 10)."""
+    try:
+        k = max(1, min(int(request.GET.get('k', 10)), 50))
+    except (TypeError, ValueError):
+        k = 10
+
+    active_apps = _active_applications_by_job(request.user)
+    return JsonResponse({'k': k, 'jobs': [{
+        'id': rec['job'].pk,
+        'title': rec['job'].title,
+        'score': rec['score'],
+        'matched_skills': rec['matched'],
+        'missing_skills': rec['missing'],
+        'already_applied': rec['job'].pk in active_apps,
+        'url': reverse('view_job', args=[rec['job'].pk]),
+    } for rec in recommend_jobs(request.user.profile, k)]})
 # ==========================
 #jats calculation
 # ==========================
 
 def job_list(request):
-    profile = request.user.profile
-    jobs = Job.objects.all()
+    page, items = _scored_job_page(request)
+
     jobs_with_score = []
+    for item in items:
+        item['recommendation'] = "Apply" if item['score'] >= 70 else "Consider Improving Resume"
+        jobs_with_score.append(item)
 
-    for job in jobs:
-        app = Application.objects.filter(user=request.user, job=job, status='applied').first()
-        ats_score = calculate_ats_score(profile, job, resume_file=(app.resume if app else None))
-        breakdown = get_skill_match(profile, job, resume_file=(app.resume if app else None))
-        apply_recommendation = "Apply" if ats_score >= 70 else "Consider Improving Resume"
-        already_applied = Application.objects.filter(user=request.user, job=job, status='applied').exists()
-        jobs_with_score.append({
-            'job': job,
-            'score': ats_score,
-            'recommendation': apply_recommendation,
-            'already_applied': already_applied,
-            'matched_skills': breakdown['matched'],
-            'missing_skills': breakdown['missing'],
-            'used_resume': breakdown['used_resume']
-        })
+    return render(request, 'jobs/job_list.html', {'jobs_with_score': jobs_with_score, 'page': page})
 
-    return render(request, 'jobs/job_list.html', {'jobs_with_score': jobs_with_score})
+
+def _float_param(request, name):
+    try:
+        return float(request.GET[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+@login_required
+def search_jobs(request):
+    """Full-text job search (?q=), optionally only jobs the student qualifies for (?cgpa=, ?experience=)."""
+    query = request.GET.get('q', '').strip()
+    cgpa = _float_param(request, 'cgpa')
+    experience = _float_param(request, 'experience')
+    jobs = find_jobs(query, cgpa=cgpa, experience=experience)
+    return render(request, 'search_jobs.html', {
+        'jobs': jobs, 'q': query, 'cgpa': cgpa, 'experience': experience,
+    })
 
 # ==========================
 # UPLOAD RESUME (STUDENT)
@@ -202,9 +272,11 @@ def upload_resume(request):
         resume = request.FILES.get("resume")
 
         profile = request.user.profile
-        profile.skills = skills
+        if skills is not None:
+            profile.set_skills([s.strip() for s in skills.split(',') if s.strip()])
         profile.resume = resume
         profile.save()
+        enqueue_resume_extraction(profile.resume)
 
         messages.success(request, "Resume uploaded successfully")
 
@@ -216,25 +288,14 @@ def upload_resume(request):
 # ==========================
 @login_required
 def view_jobs(request):
-    profile = request.user.profile
-    jobs = Job.objects.all()
+    page, items = _scored_job_page(request)
 
     jobs_with_score = []
-    for job in jobs:
-        app = Application.objects.filter(user=request.user, job=job, status='applied').first()
-        ats_score = calculate_ats_score(profile, job, resume_file=(app.resume if app else None))
-        breakdown = get_skill_match(profile, job, resume_file=(app.resume if app else None))
-        recommendation = "Apply" if ats_score >= 70 else "Consider Improving Resume"
-        jobs_with_score.append({
-            'job': job,
-            'score': ats_score,
-            'recommendation': recommendation,
-            'matched_skills': breakdown['matched'],
-            'missing_skills': breakdown['missing'],
-            'used_resume': breakdown['used_resume']
-        })
+    for item in items:
+        item['recommendation'] = "Apply" if item['score'] >= 70 else "Consider Improving Resume"
+        jobs_with_score.append(item)
 
-    return render(request, "view_jobs.html", {"jobs_with_score": jobs_with_score})
+    return render(request, "view_jobs.html", {"jobs_with_score": jobs_with_score, "page": page})
 
 
 @login_required
@@ -257,8 +318,12 @@ def view_job(request, job_id):
     except Exception:
         app = None
 
-    score = calculate_ats_score(profile, job, resume_file=(app.resume if app else None)) if profile else 0
-    breakdown = get_skill_match(profile, job, resume_file=(app.resume if app else None)) if profile else {'matched': [], 'missing': [], 'used_resume': False}
+    if profile:
+        breakdown = score_profile_against_jobs(profile, [job], {job.pk: app.resume} if app else None)[job.pk]
+        score = breakdown['score']
+    else:
+        score = 0
+        breakdown = {'matched': [], 'missing': [], 'used_resume': False}
     recommendation = "Apply" if score >= 70 else "Consider Improving Resume"
 
     return render(request, 'view_jobs.html', {
@@ -287,11 +352,11 @@ def apply_external(request, job_id):
         subject = f"New application for {job.title}"
         message = f"{request.user.username} has applied to your job posting '{job.title}'.\n" \
                   f"View the application on the portal."
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [job.recruiter.email], fail_silently=True)
-    Notification.objects.create(
-        user=job.recruiter,
-        message=f"{request.user.username} applied to '{job.title}'",
-        url=reverse('recruiter_applications')
+        queue_email(subject, message, [job.recruiter.email])
+    notify_users(
+        [job.recruiter_id],
+        f"{request.user.username} applied to '{job.title}'",
+        reverse('recruiter_applications'),
     )
 
     # redirect to external link if provided, otherwise back to job page
@@ -325,6 +390,7 @@ def apply_job(request, job_id):
     app.status = 'applied'
     app.withdrawn_at = None
     app.save()
+    enqueue_resume_extraction(app.resume)
 
     # send mail/notification to recruiter
     if job.recruiter and job.recruiter.email:
@@ -334,11 +400,11 @@ def apply_job(request, job_id):
             f"{request.user.username} just applied for your job '{job.title}'.\n"
             "Log in to view the resume and manage the application.\n"
         )
-        send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [job.recruiter.email], fail_silently=True)
-    Notification.objects.create(
-        user=job.recruiter,
-        message=f"{request.user.username} applied to '{job.title}'",
-        url=reverse('recruiter_applications')
+        queue_email(subject, body, [job.recruiter.email])
+    notify_users(
+        [job.recruiter_id],
+        f"{request.user.username} applied to '{job.title}'",
+        reverse('recruiter_applications'),
     )
 
     messages.success(request, "Applied successfully")
@@ -347,12 +413,17 @@ def apply_job(request, job_id):
 @login_required
 def student_applications(request):
     profile = request.user.profile
-    applications = Application.objects.filter(user=request.user).select_related('job')
+    applications = list(Application.objects.filter(user=request.user).select_related('job'))
+    results = score_profile_against_jobs(
+        profile,
+        [app.job for app in applications],
+        {app.job_id: app.resume for app in applications if getattr(app, 'resume', None)},
+    )
 
     apps_with_score = []
     for app in applications:
-        score = calculate_ats_score(profile, app.job, resume_file=(app.resume if getattr(app, 'resume', None) else None))
-        breakdown = get_skill_match(profile, app.job, resume_file=(app.resume if getattr(app, 'resume', None) else None))
+        breakdown = results[app.job_id]
+        score = breakdown['score']
         recommendation = "Apply" if score >= 70 else "Improve Resume"
         apps_with_score.append({
             'application': app,
@@ -372,12 +443,14 @@ def student_applications(request):
 # ===============================
 @login_required
 def notifications(request):
-    notes = Notification.objects.filter(user=request.user).order_by('-created_at')
     # optionally mark all as read
     if request.method == 'POST':
-        notes.update(read=True)
+        mark_all_read(request.user)
         return redirect('notifications')
-    return render(request, 'notifications.html', {'notifications': notes})
+    page = keyset_paginate(
+        request, Notification.objects.filter(user=request.user), ordering=('-created_at', '-id')
+    )
+    return render(request, 'notifications.html', {'notifications': page.items, 'page': page})
 
 
 @login_required
@@ -408,14 +481,10 @@ def recruiter_dashboard(request):
         job__recruiter=request.user
     ).order_by('-applied_at')[:5]
 
-    # notification count for display
-    unread_count = Notification.objects.filter(user=request.user, read=False).count()
-
     return render(request, 'recruiter_dashboard.html', {
         'total_jobs': total_jobs,
         'total_applications': total_applications,
         'recent_applications': recent_applications,
-        'unread_notifications': unread_count
     })
 
 
@@ -431,9 +500,8 @@ def post_job(request):
         raw_skills = request.POST.get('skills') or request.POST.get('required_skills', '')
         description = request.POST.get('description', '').strip()
 
-        # normalize comma-separated skills into a JSON string (list)
+        # normalize comma-separated skills into a list
         skills_list = [s.strip() for s in raw_skills.split(',') if s.strip()]
-        required_skills_json = json.dumps(skills_list)
         application_link = request.POST.get('application_link', '').strip()
 
         # avoid creating exact duplicate jobs for the same recruiter
@@ -441,30 +509,27 @@ def post_job(request):
             recruiter=request.user,
             title__iexact=title,
             description__iexact=description,
-            required_skills=required_skills_json
+            required_skills=skills_list
         ).exists()
         if not exists:
             job = Job.objects.create(
                 recruiter=request.user,
                 title=title,
-                required_skills=required_skills_json,
+                required_skills=skills_list,
                 description=description,
-                application_link=application_link
+                application_link=application_link,
+                alerts_pending=True,
             )
             # send confirmation email
             if request.user.email:
-                send_mail(
+                queue_email(
                     'Job Posted Successfully',
                     f"Your job '{title}' has been posted on TalentFlow.",
-                    settings.DEFAULT_FROM_EMAIL,
                     [request.user.email],
-                    fail_silently=True
                 )
-            # add notification
-            Notification.objects.create(
-                user=request.user,
-                message=f"Job '{title}' was posted successfully."
-            )
+            # add notification; students whose skills match are alerted by the send_job_alerts worker
+            notify_users([request.user], f"Job '{title}' was posted successfully.")
+            queue_job_alerts(job)
         else:
             messages.info(request, "An identical job already exists and was not created.")
         messages.success(request, "Job posted successfully")
@@ -478,8 +543,26 @@ def post_job(request):
 # ===============================
 @login_required
 def recruiter_jobs(request):
-    jobs = Job.objects.filter(recruiter=request.user)
-    return render(request, 'recruiter_jobs.html', {'jobs': jobs})
+    page = keyset_paginate(request, Job.objects.filter(recruiter=request.user))
+    return render(request, 'recruiter_jobs.html', {'jobs': page.items, 'page': page})
+
+
+@login_required
+def job_top_candidates(request, job_id):
+    """Students whose profile skills best cover one of the recruiter's jobs."""
+    job = get_object_or_404(Job, id=job_id, recruiter=request.user)
+    try:
+        limit = max(1, min(int(request.GET.get('n', 10)), 100))
+    except (TypeError, ValueError):
+        limit = 10
+
+    candidates = top_candidates_for_job(job, limit)
+    return render(request, 'job_candidates.html', {
+        'job': job,
+        'candidates': candidates,
+        'required_count': len(skill_ids(job.get_required_skills() or [])),
+        'limit': limit
+    })
 
 
 @login_required
@@ -502,18 +585,9 @@ def remove_profile(request):
     profile.experience = 0
 
     # clear JSON fields
-    try:
-        profile.set_skills([])
-    except Exception:
-        profile.skills = '[]'
-    try:
-        profile.set_certifications([])
-    except Exception:
-        profile.certifications = '[]'
-    try:
-        profile.set_links({})
-    except Exception:
-        profile.other_links = '{}'
+    profile.set_skills([])
+    profile.set_certifications([])
+    profile.set_links({})
 
     # remove uploaded files if present (don't raise if missing)
     try:
@@ -538,17 +612,83 @@ def remove_profile(request):
 # ==========================
 @login_required
 def recruiter_applications(request):
-    applications = Application.objects.filter(
-        job__recruiter=request.user
-    ).select_related('job', 'user')
+    page = keyset_paginate(
+        request,
+        Application.objects.filter(job__recruiter=request.user).select_related('job', 'user'),
+        ordering=('-applied_at', '-id'),
+    )
 
     return render(
         request,
         'recruiter_applications.html',
-        {'applications': applications}
+        {'applications': page.items, 'page': page}
     )
 
 
+@login_required
+def resume_search(request):
+    """Full-text search over the resumes of applicants to the recruiter's jobs (?q=, ?job=)."""
+    jobs = Job.objects.filter(recruiter=request.user).order_by('-id')
+    query = request.GET.get('q', '').strip()
+    try:
+        job = jobs.get(id=int(request.GET['job']))
+    except (KeyError, ValueError, Job.DoesNotExist):
+        job = None
+
+    hits, error = [], ''
+    if query:
+        try:
+            hits = search_resumes(request.user, query, job=job)
+        except QueryError as exc:
+            error = str(exc)
+    for hit in hits:
+        app = hit['applications'][0]
+        resume = app.resume or app.user.profile.resume
+        hit['resume_url'] = resume.url if resume else ''
+    return render(request, 'resume_search.html', {
+        'q': query, 'jobs': jobs, 'job': job, 'hits': hits, 'error': error,
+    })
+
+
+@login_required
+def job_applicants(request, job_id):
+    """Applicants of one of the recruiter's jobs, ranked by ATS score.
+
+    ?format=jsonl streams the ranking as JSON lines, one applicant per line,
+    each encoded only as it is sent.
+    """
+    job = get_object_or_404(Job, id=job_id, recruiter=request.user)
+    ranked = rank_applicants(job)
+
+    if request.GET.get('format') == 'jsonl':
+        lines = (
+            json.dumps({
+                'rank': rank,
+                'application_id': app.id,
+                'username': app.user.username,
+                'score': score.score,
+                'matched_skills': score.get_matched_skills(),
+                'missing_skills': score.get_missing_skills(),
+                'used_resume': score.used_resume,
+                'resume_url': app.resume.url if app.resume else '',
+                'applied_at': app.applied_at.isoformat(),
+            }) + '\n'
+            for rank, (app, score) in enumerate(ranked, start=1)
+        )
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+    return render(request, 'job_applicants.html', {
+        'job': job,
+        'ranked': [{
+            'application': app,
+            'score': score.score,
+            'matched_skills': score.get_matched_skills(),
+            'missing_skills': score.get_missing_skills(),
+            'used_resume': score.used_resume
+        } for app, score in ranked]
+    })
+
+
 @login_required
 def withdraw_application(request, application_id):
     app = get_object_or_404(Application, id=application_id, user=request.user)
@@ -663,31 +803,21 @@ def edit_profile(request):
 # ==========================
 @staff_member_required
 def ats_debug(request):
-    """Admin page that shows recent entries from ats_debug.log and allows filtering by username."""
-    log_path = os.path.join(os.getcwd(), 'ats_debug.log')
-    entries = []
-    raw = ''
-    if os.path.exists(log_path):
-        try:
-            with open(log_path, 'r', encoding='utf-8') as f:
-                raw = f.read()
-        except Exception:
-            raw = ''
-
-    if raw:
-        # Split entries by double newline (as written by logger)
-        blocks = [b.strip() for b in raw.split('\n\n') if b.strip()]
-        # keep latest first
-        blocks.reverse()
-        user_filter = request.GET.get('user')
-        for b in blocks[:200]:
-            if user_filter:
-                if f"user={user_filter}" in b:
-                    entries.append(b)
-            else:
-                entries.append(b)
-
-    return render(request, 'ats_debug.html', {'entries': entries, 'log_path': log_path})
+    """Admin page that shows recent scoring trace entries and allows filtering by username."""
+    log_path = trace_settings()['PATH']
+    user_filter = request.GET.get('user', '').strip()
+    limit = 200
+    try:
+        entries = tail_entries(log_path, limit, user_filter or None)
+    except OSError:
+        entries = []
+
+    return render(request, 'ats_debug.html', {
+        'entries': entries,
+        'log_path': log_path,
+        'user_filter': user_filter,
+        'limit': limit,
+    })
 
 
 @login_required
@@ -714,12 +844,11 @@ def resume_preview(request):
         try:
             resume_path = getattr(resume_file, 'path', None)
             if resume_path:
-                resume_text = _extract_resume_text(resume_path)
-                if _is_resume_like(resume_text):
+                analysis = _resume_analysis_for(resume_file)
+                # if not resume-like (or not extracted yet), show empty and invite reupload
+                if analysis['is_resume_like']:
+                    resume_text = analysis['text']
                     used_resume = True
-                else:
-                    # if not resume-like, show empty and invite reupload
-                    resume_text = ''
         except Exception:
             resume_text = ''
 